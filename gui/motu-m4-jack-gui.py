@@ -10,7 +10,10 @@ Features:
 - Flexible buffer size selection (16 - 4096 frames)
 - Adjustable periods (2-8)
 - Live latency calculation
+- MIDI throughput and clock jitter of hardware MIDI ports
+- Active power profile with measured power/wakeup difference
 - Quick presets for common configurations
+- Stability ranking of configurations from the performance log
 - Automatic system theme integration (KDE/GNOME/etc.)
 
 Copyright (C) 2025
@@ -21,10 +24,12 @@ import gi
 
 gi.require_version("Gtk", "3.0")
 gi.require_version("Gdk", "3.0")
+import json
 import logging
 import os
 import subprocess
 import threading
+import time
 
 from gi.repository import Gdk, GLib, Gtk
 
@@ -53,6 +58,18 @@ class MotuM4JackGUI(Gtk.Window):
     SYSTEM_CONFIG_FILE = "/etc/motu-m4/jack-setting.conf"
     USER_CONFIG_FILE = os.path.expanduser("~/.config/motu-m4/jack-setting.conf")
     SETTING_SCRIPT = "/usr/local/bin/motu-m4-jack-setting-system.sh"
+    PERFLOG_SCRIPT = "/usr/local/bin/motu-m4-jack-perflog.py"
+    MIDI_STATS_FILE = "/run/motu-m4/midi-stats.json"
+    POWER_STATE_FILE = "/run/motu-m4/power-profile.state"
+
+    # MIDI statistics older than this are considered stale (monitor stopped)
+    MIDI_STATS_MAX_AGE = 10
+
+    # Power profile state older than this is considered stale (watcher stopped)
+    POWER_STATE_MAX_AGE = 60
+
+    # Time ranges for the stability view (label, days - None means all)
+    STABILITY_RANGES = [("Last 7 days", 7), ("Last 30 days", 30), ("All time", None)]
 
     # Valid values
     SAMPLE_RATES = [22050, 44100, 48000, 88200, 96000, 176400, 192000]
@@ -132,6 +149,12 @@ class MotuM4JackGUI(Gtk.Window):
         self.current_config_label.set_halign(Gtk.Align.START)
         status_box.pack_start(self.current_config_label, False, False, 0)
 
+        # Power profile (shown while the power profile watcher is running)
+        self.power_label = Gtk.Label()
+        self.power_label.set_halign(Gtk.Align.START)
+        self.power_label.set_no_show_all(True)
+        status_box.pack_start(self.power_label, False, False, 0)
+
         # Configuration frame
         config_frame = Gtk.Frame(label=" JACK Configuration ")
         config_box = Gtk.Box(orientation=Gtk.Orientation.VERTICAL, spacing=10)
@@ -213,6 +236,14 @@ class MotuM4JackGUI(Gtk.Window):
         )
         latency_box.pack_start(self.latency_label, False, False, 0)
 
+        # MIDI timing statistics (shown while the MIDI monitor is running)
+        self.midi_stats_label = Gtk.Label()
+        self.midi_stats_label.set_tooltip_text(
+            "Hardware MIDI throughput and clock jitter (MIDI_STATS_ENABLE=true)"
+        )
+        self.midi_stats_label.set_no_show_all(True)
+        latency_box.pack_start(self.midi_stats_label, False, False, 0)
+
         # Latency warning
         self.latency_warning = Gtk.Label()
         self.latency_warning.set_markup(
@@ -268,6 +299,19 @@ class MotuM4JackGUI(Gtk.Window):
         a2j_box.pack_start(self.a2j_status_label, False, False, 0)
         options_box.pack_start(a2j_box, False, False, 0)
 
+        # Direct JACK MIDI checkbox
+        self.midi_raw_check = Gtk.CheckButton(
+            label="Direct JACK MIDI for hardware ports (skips ALSA sequencer)"
+        )
+        self.midi_raw_check.set_active(False)
+        self.midi_raw_check.set_tooltip_text(
+            "Uses JACK's raw ALSA MIDI driver: the M4 MIDI ports appear as\n"
+            "system:midi_* ports without the a2jmidid/ALSA sequencer hop.\n"
+            "Disable the A2J bridge to avoid duplicate ports."
+        )
+        options_box.pack_start(self.midi_raw_check, False, False, 0)
+        self.configured_midi_driver = "none"
+
         # Checkbox for automatic restart
         self.restart_check = Gtk.CheckButton(
             label="Automatically restart JACK after changes"
@@ -280,6 +324,14 @@ class MotuM4JackGUI(Gtk.Window):
         button_box.set_halign(Gtk.Align.END)
         main_box.pack_start(button_box, False, False, 5)
 
+        # Stability button
+        stability_button = Gtk.Button(label="Stability")
+        stability_button.set_tooltip_text(
+            "Rank configurations by xruns and DSP load from the performance log"
+        )
+        stability_button.connect("clicked", self.on_stability_clicked)
+        button_box.pack_start(stability_button, False, False, 0)
+
         # Refresh button
         refresh_button = Gtk.Button(label="Refresh")
         refresh_button.connect("clicked", self.on_refresh_clicked)
@@ -520,6 +572,12 @@ class MotuM4JackGUI(Gtk.Window):
                 f"<small><span foreground='{self.color_error}'>(stopped)</span></small>"
             )
 
+        # MIDI statistics
+        self.update_midi_stats_display()
+
+        # Power profile
+        self.update_power_display()
+
         # Current config display
         config = self.read_current_config()
         rate = config.get("rate", 48000)
@@ -538,7 +596,13 @@ class MotuM4JackGUI(Gtk.Window):
 
     def read_current_config(self):
         """Reads the current configuration from config files"""
-        config = {"rate": 48000, "period": 256, "nperiods": 3, "a2j_enable": False}
+        config = {
+            "rate": 48000,
+            "period": 256,
+            "nperiods": 3,
+            "a2j_enable": False,
+            "midi_driver": "none",
+        }
 
         # Try user config first, then system config
         for config_file in [self.USER_CONFIG_FILE, self.SYSTEM_CONFIG_FILE]:
@@ -565,6 +629,8 @@ class MotuM4JackGUI(Gtk.Window):
                                         "1",
                                         "on",
                                     )
+                                elif line.startswith("JACK_MIDI_DRIVER="):
+                                    config["midi_driver"] = line.split("=")[1].strip()
                                 elif line.startswith("JACK_SETTING="):
                                     # Legacy v1.x format
                                     setting = int(line.split("=")[1].strip())
@@ -608,8 +674,115 @@ class MotuM4JackGUI(Gtk.Window):
         # Set A2J checkbox
         self.a2j_check.set_active(config["a2j_enable"])
 
+        # Set direct JACK MIDI checkbox
+        self.configured_midi_driver = config["midi_driver"]
+        self.midi_raw_check.set_active(config["midi_driver"] == "raw")
+
         self.updating_ui = False
 
+    def read_midi_stats(self):
+        """Reads MIDI statistics written by the MIDI monitor (None if not running)"""
+        try:
+            with open(self.MIDI_STATS_FILE, "r") as f:
+                stats = json.load(f)
+        except FileNotFoundError:
+            return None
+        except (ValueError, OSError) as e:
+            logger.warning("Failed to read MIDI statistics: %s", str(e))
+            return None
+
+        if time.time() - stats.get("updated", 0) > self.MIDI_STATS_MAX_AGE:
+            return None
+        return stats
+
+    def update_midi_stats_display(self):
+        """Shows summed MIDI throughput and worst clock jitter of all ports"""
+        stats = self.read_midi_stats()
+        if not stats or not stats.get("ports"):
+            self.midi_stats_label.hide()
+            return
+
+        ports = stats["ports"].values()
+        events = sum(port.get("events_per_sec", 0) for port in ports)
+        jitters = [port["jitter_ms"] for port in ports if port.get("jitter_ms") is not None]
+
+        text = f"MIDI: <b>{events:.1f}</b> events/s"
+        if jitters:
+            jitter = max(jitters)
+            color = self.color_success if jitter < 1.0 else self.color_warning
+            text += f"  |  clock jitter <span foreground='{color}'><b>{jitter:.2f} ms</b></span>"
+        else:
+            text += "  |  clock jitter n/a (no MIDI clock)"
+
+        self.midi_stats_label.set_markup(f"<small>{text}</small>")
+        self.midi_stats_label.set_tooltip_text(
+            "\n".join(
+                f"{name}: {port.get('events_per_sec', 0):.1f} ev/s"
+                + (f", jitter {port['jitter_ms']:.2f} ms" if port.get("jitter_ms") is not None else "")
+                for name, port in stats["ports"].items()
+            )
+        )
+        self.midi_stats_label.show()
+
+    def read_power_state(self):
+        """Reads the power profile state (None if the watcher is not running)"""
+        state = {}
+        try:
+            with open(self.POWER_STATE_FILE, "r") as f:
+                for line in f:
+                    key, _, value = line.strip().partition("=")
+                    state[key] = value
+        except FileNotFoundError:
+            return None
+        except OSError as e:
+            logger.warning("Failed to read power profile state: %s", str(e))
+            return None
+
+        try:
+            updated = int(state.get("UPDATED", "0"))
+        except ValueError:
+            return None
+        if not state.get("PROFILE") or time.time() - updated > self.POWER_STATE_MAX_AGE:
+            return None
+        return state
+
+    def update_power_display(self):
+        """Shows the active power profile and the measured trade-off"""
+        state = self.read_power_state()
+        if not state:
+            self.power_label.hide()
+            return
+
+        profile = state["PROFILE"]
+        desc = state.get(f"{profile.upper()}_DESC", "")
+        text = f"Power profile: <b>{profile.capitalize()}</b> ({state.get('REASON', '')}) | {desc}"
+
+        # Measured difference between the profiles (efficiency vs performance)
+        details = []
+        perf_power = state.get("PERFORMANCE_POWER_MW")
+        eff_power = state.get("EFFICIENCY_POWER_MW")
+        if perf_power and eff_power:
+            saved = (int(perf_power) - int(eff_power)) / 1000
+            details.append(f"{saved:+.1f} W saved")
+        perf_wakeups = state.get("PERFORMANCE_WAKEUPS")
+        eff_wakeups = state.get("EFFICIENCY_WAKEUPS")
+        if perf_wakeups and eff_wakeups:
+            details.append(f"{int(perf_wakeups) - int(eff_wakeups):+d} wakeups/s saved")
+        if details:
+            text += f" | <span foreground='{self.color_success}'>{', '.join(details)}</span>"
+
+        self.power_label.set_markup(f"<small>{text}</small>")
+        self.power_label.set_tooltip_text(
+            f"Performance ({state.get('PERFORMANCE_DESC', '?')}): "
+            f"{perf_wakeups or 'n/a'} wakeups/s, "
+            f"{perf_power + ' mW' if perf_power else 'power n/a'}\n"
+            f"Efficiency ({state.get('EFFICIENCY_DESC', '?')}): "
+            f"{eff_wakeups or 'n/a'} wakeups/s, "
+            f"{eff_power + ' mW' if eff_power else 'power n/a'}\n"
+            "Power is measured on battery - run 'motu-m4-power-profile.sh compare'"
+        )
+        self.power_label.show()
+
     def check_a2j_status(self):
         """Checks if a2jmidid bridge is actually active"""
         try:
@@ -698,6 +871,121 @@ class MotuM4JackGUI(Gtk.Window):
         self.load_current_config()
         self.update_latency_display()
 
+    def read_performance_report(self, days=None):
+        """Reads per-configuration statistics from the performance log"""
+        cmd = [self.PERFLOG_SCRIPT, "report", "--json"]
+        if days:
+            cmd.append(f"--days={days}")
+        try:
+            result = subprocess.run(cmd, capture_output=True, text=True, timeout=10)
+            if result.returncode != 0:
+                logger.warning("Performance report failed: %s", result.stderr.strip())
+                return []
+            return json.loads(result.stdout)
+        except subprocess.TimeoutExpired:
+            logger.error("Performance report timed out after 10 seconds")
+            return []
+        except FileNotFoundError:
+            logger.error("Performance log script not found: %s", self.PERFLOG_SCRIPT)
+            return []
+        except ValueError as e:
+            logger.error("Invalid performance report output: %s", str(e))
+            return []
+        except Exception as e:
+            logger.exception("Unexpected error reading performance report: %s", type(e).__name__)
+            return []
+
+    def get_preset_name(self, rate, period, nperiods):
+        """Returns the preset name matching a configuration, or 'Custom'"""
+        for preset in self.PRESETS.values():
+            if (preset["rate"], preset["period"], preset["nperiods"]) == (rate, period, nperiods):
+                return preset["name"]
+        return "Custom"
+
+    def fill_stability_store(self, store, days):
+        """Fills the stability list with ranked configurations and unused presets"""
+        store.clear()
+        report = self.read_performance_report(days)
+        recorded = set()
+
+        for rank, entry in enumerate(report, 1):
+            key = (entry["rate"], entry["period"], entry["nperiods"])
+            recorded.add(key)
+            _, roundtrip = self.calculate_latency(*key)
+            xruns_per_hour = entry["xruns_per_hour"]
+            load_p95 = entry["load_p95"]
+            store.append([
+                str(rank),
+                self.get_preset_name(*key),
+                f"{entry['rate']} Hz, {entry['period']}x{entry['nperiods']} (~{roundtrip} ms)",
+                str(entry["sessions"]),
+                f"{entry['uptime_hours']:.1f}",
+                "-" if xruns_per_hour is None else f"{xruns_per_hour:.2f}",
+                "-" if load_p95 is None else f"{load_p95:.1f} %",
+            ])
+
+        # Presets without recorded sessions are listed at the end
+        for preset in self.PRESETS.values():
+            key = (preset["rate"], preset["period"], preset["nperiods"])
+            if key not in recorded:
+                _, roundtrip = self._calculate_preset_latency(preset)
+                store.append([
+                    "-",
+                    preset["name"],
+                    f"{preset['rate']} Hz, {preset['period']}x{preset['nperiods']} (~{roundtrip} ms)",
+                    "0",
+                    "-",
+                    "no data",
+                    "-",
+                ])
+
+    def on_stability_clicked(self, button):
+        """Shows configurations ranked by stability (xruns per hour, DSP load)"""
+        dialog = Gtk.Dialog(title="Configuration Stability", transient_for=self, flags=0)
+        dialog.add_button("Close", Gtk.ResponseType.CLOSE)
+        dialog.set_default_size(640, 320)
+
+        content = dialog.get_content_area()
+        content.set_spacing(8)
+        content.set_border_width(10)
+
+        range_combo = Gtk.ComboBoxText()
+        for label, _ in self.STABILITY_RANGES:
+            range_combo.append_text(label)
+        range_combo.set_active(0)
+        range_combo.set_halign(Gtk.Align.START)
+        content.pack_start(range_combo, False, False, 0)
+
+        # Rank, Preset, Configuration, Sessions, Hours, Xruns/h, DSP p95
+        store = Gtk.ListStore(str, str, str, str, str, str, str)
+        tree = Gtk.TreeView(model=store)
+        columns = ["#", "Preset", "Configuration", "Sessions", "Hours", "Xruns/h", "DSP p95"]
+        for idx, title in enumerate(columns):
+            tree.append_column(Gtk.TreeViewColumn(title, Gtk.CellRendererText(), text=idx))
+
+        scrolled = Gtk.ScrolledWindow()
+        scrolled.set_vexpand(True)
+        scrolled.add(tree)
+        content.pack_start(scrolled, True, True, 0)
+
+        hint = Gtk.Label()
+        hint.set_markup(
+            "<small>Ranked by xruns per hour, then by 95th percentile DSP load.</small>"
+        )
+        hint.set_halign(Gtk.Align.START)
+        content.pack_start(hint, False, False, 0)
+
+        def on_range_changed(combo):
+            _, days = self.STABILITY_RANGES[combo.get_active()]
+            self.fill_stability_store(store, days)
+
+        range_combo.connect("changed", on_range_changed)
+        on_range_changed(range_combo)
+
+        dialog.show_all()
+        dialog.run()
+        dialog.destroy()
+
     def on_apply_clicked(self, button):
         """Handler for apply button"""
         rate = self.get_selected_rate()
@@ -706,6 +994,14 @@ class MotuM4JackGUI(Gtk.Window):
         a2j_enable = self.a2j_check.get_active()
         restart = self.restart_check.get_active()
 
+        # Keep a manually configured driver (e.g. 'seq') unless direct mode is toggled
+        if self.midi_raw_check.get_active():
+            midi_driver = "raw"
+        elif self.configured_midi_driver == "raw":
+            midi_driver = "none"
+        else:
+            midi_driver = self.configured_midi_driver
+
         latency = self.calculate_latency(rate, period, nperiods)
 
         # Disable UI during application
@@ -717,12 +1013,12 @@ class MotuM4JackGUI(Gtk.Window):
         # Run in separate thread
         thread = threading.Thread(
             target=self.apply_setting,
-            args=(rate, period, nperiods, a2j_enable, restart),
+            args=(rate, period, nperiods, a2j_enable, midi_driver, restart),
         )
         thread.daemon = True
         thread.start()
 
-    def apply_setting(self, rate, period, nperiods, a2j_enable, restart):
+    def apply_setting(self, rate, period, nperiods, a2j_enable, midi_driver, restart):
         """Applies the setting (runs in separate thread)"""
         try:
             # Build command with new v2.0 syntax
@@ -734,12 +1030,13 @@ class MotuM4JackGUI(Gtk.Window):
                 f"--period={period}",
                 f"--nperiods={nperiods}",
                 f"--a2j={a2j_value}",
+                f"--midi-driver={midi_driver}",
             ]
             if restart:
                 cmd.append("--restart")
 
-            logger.info("Applying settings: rate=%d, period=%d, nperiods=%d, a2j=%s, restart=%s",
-                       rate, period, nperiods, a2j_value, restart)
+            logger.info("Applying settings: rate=%d, period=%d, nperiods=%d, a2j=%s, midi_driver=%s, restart=%s",
+                       rate, period, nperiods, a2j_value, midi_driver, restart)
 
             # Execute script
             result = subprocess.run(cmd, capture_output=True, text=True, timeout=60)
@@ -3,7 +3,13 @@
 # MOTU M4 JACK Starter - Installation Script v2.0
 # =============================================================================
 # Installs all components of the MOTU M4 JACK automation system
-# Usage: sudo ./install.sh
+# Usage: sudo ./install.sh [--force]   Install (only changed files are copied)
+#        ./install.sh verify           Check installed files against manifest
+#
+# Installed files are recorded with their SHA-256 hash in
+# /etc/motu-m4/install-manifest (sha256sum format). Re-running the installer
+# only copies files whose installed copy differs from the source, and reloads
+# UDEV/systemd only when one of their files changed.
 #
 # Copyright (C) 2025
 # License: GPL-3.0-or-later
@@ -18,6 +24,20 @@ NC='\033[0m' # No Color
 # Script directory
 SCRIPT_DIR="$(cd "$(dirname "${BASH_SOURCE[0]}")" && pwd)"
 
+# Copy all files regardless of manifest (--force)
+FORCE_INSTALL=false
+
+# Manifest and file install functions (shared with install-gui.sh)
+# shellcheck source=scripts/install-common.sh
+. "$SCRIPT_DIR/scripts/install-common.sh"
+
+# Change flags per component
+UDEV_CHANGED=false
+SYSTEMD_CHANGED=false
+SESSION_WATCH_CHANGED=false
+DESKTOP_CHANGED=false
+ICON_CHANGED=false
+
 # Check if running as root
 check_root() {
     if [ "$EUID" -ne 0 ]; then
@@ -32,8 +52,31 @@ get_actual_user() {
     if [ -n "$SUDO_USER" ] && [ "$SUDO_USER" != "root" ]; then
         echo "$SUDO_USER"
     else
-        who | grep "(:" | head -n1 | awk '{print $1}'
+        # Active graphical session (X11 or Wayland) via the session resolver
+        bash "$SCRIPT_DIR/scripts/motu-m4-session.sh" user 2>/dev/null
+    fi
+}
+
+# Verify installed files against the manifest
+verify_installation() {
+    echo -e "${YELLOW}Verifying installation against $MANIFEST_FILE...${NC}"
+
+    if [ ! -f "$MANIFEST_FILE" ]; then
+        echo -e "${RED}Error:${NC} No install manifest found - run: sudo $0"
+        exit 1
+    fi
+
+    local total
+    total=$(wc -l < "$MANIFEST_FILE")
+
+    if sha256sum --check --quiet "$MANIFEST_FILE" 2>/dev/null; then
+        echo -e "${GREEN}✓ All $total installed files match the manifest${NC}"
+        exit 0
     fi
+
+    echo -e "${RED}✗ Installed files differ from manifest${NC}"
+    echo "Re-install with: sudo $0"
+    exit 1
 }
 
 # Print header
@@ -45,25 +88,42 @@ print_header() {
     echo ""
 }
 
-# Check dependencies
+# Check dependencies (probes run concurrently, results printed in order)
 check_dependencies() {
     echo -e "${YELLOW}Checking dependencies...${NC}"
 
+    local probe_dir
+    probe_dir=$(mktemp -d)
+
+    # Start all probes in the background
+    local cmd
+    for cmd in jack_control aplay bc gdbus; do
+        ( command -v "$cmd" &> /dev/null && touch "$probe_dir/$cmd" ) &
+    done
+    ( python3 -c "import jack" 2>/dev/null && touch "$probe_dir/jack-client" ) &
+    ( python3 -c "import gi; gi.require_version('Gtk', '3.0'); from gi.repository import Gtk" 2>/dev/null \
+        && touch "$probe_dir/gtk" ) &
+    wait
+
     local missing=()
 
     # Check for required commands
-    if ! command -v jack_control &> /dev/null; then
+    if [ ! -e "$probe_dir/jack_control" ]; then
         missing+=("jackd2")
     fi
 
-    if ! command -v aplay &> /dev/null; then
+    if [ ! -e "$probe_dir/aplay" ]; then
         missing+=("alsa-utils")
     fi
 
-    if ! command -v bc &> /dev/null; then
+    if [ ! -e "$probe_dir/bc" ]; then
         missing+=("bc")
     fi
 
+    if [ ! -e "$probe_dir/gdbus" ]; then
+        missing+=("libglib2.0-bin")
+    fi
+
     if [ ${#missing[@]} -gt 0 ]; then
         echo -e "${YELLOW}Warning:${NC} Missing packages: ${missing[*]}"
         echo "Install with: sudo apt install ${missing[*]}"
@@ -71,13 +131,23 @@ check_dependencies() {
         echo -e "${GREEN}✓ Core dependencies available${NC}"
     fi
 
+    # Check JACK client library for fast connection restore
+    if [ -e "$probe_dir/jack-client" ]; then
+        echo -e "${GREEN}✓ python3-jack-client available (fast connection restore)${NC}"
+    else
+        echo -e "${YELLOW}Info:${NC} python3-jack-client not found - connection restore uses jack_connect"
+        echo "Install with: sudo apt install python3-jack-client"
+    fi
+
     # Check Python GTK for GUI
-    if python3 -c "import gi; gi.require_version('Gtk', '3.0'); from gi.repository import Gtk" 2>/dev/null; then
+    if [ -e "$probe_dir/gtk" ]; then
         echo -e "${GREEN}✓ Python GTK3 available (GUI support)${NC}"
     else
         echo -e "${YELLOW}Warning:${NC} Python GTK3 not found - GUI will not work"
         echo "Install with: sudo apt install python3-gi python3-gi-cairo gir1.2-gtk-3.0"
     fi
+
+    rm -rf "$probe_dir"
 }
 
 # Install scripts
@@ -90,8 +160,14 @@ install_scripts() {
         "motu-m4-jack-autostart.sh"
         "motu-m4-jack-autostart-user.sh"
         "motu-m4-jack-init.sh"
+        "motu-m4-jack-preflight.sh"
+        "motu-m4-session.sh"
         "motu-m4-jack-shutdown.sh"
         "motu-m4-jack-restart-simple.sh"
+        "motu-m4-jack-connections.py"
+        "motu-m4-jack-perflog.py"
+        "motu-m4-midi-monitor.py"
+        "motu-m4-power-profile.sh"
         "motu-m4-jack-setting.sh"
         "motu-m4-jack-setting-system.sh"
         "motu-m4-login-check.sh"
@@ -101,9 +177,8 @@ install_scripts() {
 
     for script in "${scripts[@]}"; do
         if [ -f "$SCRIPT_DIR/scripts/$script" ]; then
-            cp "$SCRIPT_DIR/scripts/$script" /usr/local/bin/
-            chmod +x "/usr/local/bin/$script"
-            echo -e "  ${GREEN}✓${NC} $script"
+            install_file "$SCRIPT_DIR/scripts/$script" "/usr/local/bin/$script" 755
+            print_install_result $? "$script"
         else
             echo -e "  ${YELLOW}⚠${NC} $script not found - skipped"
         fi
@@ -112,26 +187,28 @@ install_scripts() {
 
 # Install GUI
 install_gui() {
+    local status
     echo ""
     echo -e "${YELLOW}Installing GUI...${NC}"
 
     # Install GUI script
     if [ -f "$SCRIPT_DIR/gui/motu-m4-jack-gui.py" ]; then
-        cp "$SCRIPT_DIR/gui/motu-m4-jack-gui.py" /usr/local/bin/
-        chmod +x /usr/local/bin/motu-m4-jack-gui.py
-        echo -e "  ${GREEN}✓${NC} motu-m4-jack-gui.py"
+        install_file "$SCRIPT_DIR/gui/motu-m4-jack-gui.py" /usr/local/bin/motu-m4-jack-gui.py 755
+        print_install_result $? "motu-m4-jack-gui.py"
     else
         echo -e "  ${RED}✗${NC} motu-m4-jack-gui.py not found"
     fi
 
     # Install desktop entry
     if [ -f "$SCRIPT_DIR/system/motu-m4-jack-settings.desktop" ]; then
-        cp "$SCRIPT_DIR/system/motu-m4-jack-settings.desktop" /usr/share/applications/
-        chmod 644 /usr/share/applications/motu-m4-jack-settings.desktop
-        echo -e "  ${GREEN}✓${NC} Desktop entry installed"
-
-        # Update desktop database
-        if command -v update-desktop-database &> /dev/null; then
+        install_file "$SCRIPT_DIR/system/motu-m4-jack-settings.desktop" \
+            /usr/share/applications/motu-m4-jack-settings.desktop 644
+        status=$?
+        [ "$status" -eq 0 ] && DESKTOP_CHANGED=true
+        print_install_result "$status" "Desktop entry"
+
+        # Update desktop database (only if the entry changed)
+        if [ "$DESKTOP_CHANGED" = true ] && command -v update-desktop-database &> /dev/null; then
             update-desktop-database /usr/share/applications/ 2>/dev/null
         fi
     else
@@ -141,12 +218,14 @@ install_gui() {
     # Install icon
     if [ -f "$SCRIPT_DIR/gui/motu-m4-jack-settings.svg" ]; then
         mkdir -p /usr/share/icons/hicolor/scalable/apps/
-        cp "$SCRIPT_DIR/gui/motu-m4-jack-settings.svg" /usr/share/icons/hicolor/scalable/apps/
-        chmod 644 /usr/share/icons/hicolor/scalable/apps/motu-m4-jack-settings.svg
-        echo -e "  ${GREEN}✓${NC} Icon installed"
-
-        # Update icon cache
-        if command -v gtk-update-icon-cache &> /dev/null; then
+        install_file "$SCRIPT_DIR/gui/motu-m4-jack-settings.svg" \
+            /usr/share/icons/hicolor/scalable/apps/motu-m4-jack-settings.svg 644
+        status=$?
+        [ "$status" -eq 0 ] && ICON_CHANGED=true
+        print_install_result "$status" "Icon"
+
+        # Update icon cache (only if the icon changed)
+        if [ "$ICON_CHANGED" = true ] && command -v gtk-update-icon-cache &> /dev/null; then
             gtk-update-icon-cache -f /usr/share/icons/hicolor/ 2>/dev/null
         fi
     else
@@ -160,11 +239,19 @@ install_udev() {
     echo -e "${YELLOW}Installing UDEV rule...${NC}"
 
     if [ -f "$SCRIPT_DIR/system/99-motu-m4-jack-combined.rules" ]; then
-        cp "$SCRIPT_DIR/system/99-motu-m4-jack-combined.rules" /etc/udev/rules.d/
-        chmod 644 /etc/udev/rules.d/99-motu-m4-jack-combined.rules
-        udevadm control --reload-rules
-        udevadm trigger
-        echo -e "  ${GREEN}✓${NC} UDEV rule installed and reloaded"
+        install_file "$SCRIPT_DIR/system/99-motu-m4-jack-combined.rules" \
+            /etc/udev/rules.d/99-motu-m4-jack-combined.rules 644
+        local status=$?
+        [ "$status" -eq 0 ] && UDEV_CHANGED=true
+
+        # Reload only if the rule changed (trigger sound devices only)
+        if [ "$UDEV_CHANGED" = true ]; then
+            udevadm control --reload-rules
+            udevadm trigger --subsystem-match=sound
+            echo -e "  ${GREEN}✓${NC} UDEV rule installed and reloaded"
+        else
+            print_install_result "$status" "UDEV rule"
+        fi
     else
         echo -e "  ${RED}✗${NC} UDEV rule file not found"
     fi
@@ -178,9 +265,9 @@ install_config_example() {
     mkdir -p /etc/motu-m4
 
     if [ -f "$SCRIPT_DIR/system/jack-setting.conf.example" ]; then
-        cp "$SCRIPT_DIR/system/jack-setting.conf.example" /etc/motu-m4/
-        chmod 644 /etc/motu-m4/jack-setting.conf.example
-        echo -e "  ${GREEN}✓${NC} Config example installed to /etc/motu-m4/"
+        install_file "$SCRIPT_DIR/system/jack-setting.conf.example" \
+            /etc/motu-m4/jack-setting.conf.example 644
+        print_install_result $? "Config example"
 
         # Create default config if none exists
         if [ ! -f "/etc/motu-m4/jack-setting.conf" ]; then
@@ -213,10 +300,14 @@ install_polkit() {
     echo -e "${YELLOW}Installing Polkit rule (passwordless operation)...${NC}"
 
     if [ -f "$SCRIPT_DIR/system/50-motu-m4-jack-settings.rules" ]; then
-        cp "$SCRIPT_DIR/system/50-motu-m4-jack-settings.rules" /etc/polkit-1/rules.d/
-        chmod 644 /etc/polkit-1/rules.d/50-motu-m4-jack-settings.rules
-        echo -e "  ${GREEN}✓${NC} Polkit rule installed"
-        echo -e "  ${BLUE}Info:${NC} Members of 'audio' group can change settings without password"
+        # polkitd watches its rules directory, no explicit reload needed
+        install_file "$SCRIPT_DIR/system/50-motu-m4-jack-settings.rules" \
+            /etc/polkit-1/rules.d/50-motu-m4-jack-settings.rules 644
+        local status=$?
+        print_install_result "$status" "Polkit rule"
+        if [ "$status" -eq 0 ]; then
+            echo -e "  ${BLUE}Info:${NC} Members of 'audio' group can change settings without password"
+        fi
     else
         echo -e "  ${YELLOW}⚠${NC} Polkit rule not found - skipped"
         echo "  GUI will require password for each change"
@@ -245,21 +336,60 @@ install_systemd_service() {
         # Create directory as user
         runuser -l "$actual_user" -c "mkdir -p $service_dir"
 
-        # Copy service file
-        cp "$SCRIPT_DIR/system/motu-m4-login-check.service" "$service_dir/"
-        chown "$actual_user:$actual_user" "$service_dir/motu-m4-login-check.service"
-
-        # Enable service as user
-        runuser -l "$actual_user" -c "systemctl --user daemon-reload"
-        runuser -l "$actual_user" -c "systemctl --user enable motu-m4-login-check.service"
+        # Copy service file (only if changed)
+        install_file "$SCRIPT_DIR/system/motu-m4-login-check.service" \
+            "$service_dir/motu-m4-login-check.service" 644
+        local status=$?
+        if [ "$status" -eq 0 ]; then
+            chown "$actual_user:$actual_user" "$service_dir/motu-m4-login-check.service"
+            SYSTEMD_CHANGED=true
+        fi
 
-        echo -e "  ${GREEN}✓${NC} Service installed for user '$actual_user'"
-        echo -e "  ${GREEN}✓${NC} Service enabled"
+        # Reload and enable only if the unit changed or is not enabled yet
+        if [ "$status" -eq 2 ]; then
+            echo -e "  ${RED}✗${NC} Service not enabled"
+        elif [ "$SYSTEMD_CHANGED" = true ] || \
+           ! runuser -l "$actual_user" -c "systemctl --user is-enabled --quiet motu-m4-login-check.service" 2>/dev/null; then
+            runuser -l "$actual_user" -c "systemctl --user daemon-reload"
+            runuser -l "$actual_user" -c "systemctl --user enable motu-m4-login-check.service"
+            echo -e "  ${GREEN}✓${NC} Service installed for user '$actual_user'"
+            echo -e "  ${GREEN}✓${NC} Service enabled"
+        else
+            print_install_result 1 "Service for user '$actual_user'"
+        fi
     else
         echo -e "  ${RED}✗${NC} Service file not found"
     fi
 }
 
+# Install session watcher (system service)
+install_session_watcher() {
+    echo ""
+    echo -e "${YELLOW}Installing session watcher...${NC}"
+
+    if [ -f "$SCRIPT_DIR/system/motu-m4-session-watch.service" ]; then
+        install_file "$SCRIPT_DIR/system/motu-m4-session-watch.service" \
+            /etc/systemd/system/motu-m4-session-watch.service 644
+        local status=$?
+        [ "$status" -eq 0 ] && SESSION_WATCH_CHANGED=true
+
+        # Reload and (re)start only if the unit changed or is not enabled yet
+        if [ "$status" -eq 2 ]; then
+            echo -e "  ${RED}✗${NC} Session watcher not started"
+        elif [ "$SESSION_WATCH_CHANGED" = true ] || \
+           ! systemctl is-enabled --quiet motu-m4-session-watch.service 2>/dev/null; then
+            systemctl daemon-reload
+            systemctl enable motu-m4-session-watch.service
+            systemctl restart motu-m4-session-watch.service
+            echo -e "  ${GREEN}✓${NC} Session watcher installed and started"
+        else
+            print_install_result 1 "Session watcher"
+        fi
+    else
+        echo -e "  ${RED}✗${NC} Session watcher service file not found"
+    fi
+}
+
 # Check audio group membership
 check_audio_group() {
     echo ""
@@ -303,6 +433,9 @@ print_summary() {
     echo ""
     echo "  3. Connect your MOTU M4 - JACK will start automatically!"
     echo ""
+    echo "Verify the installed files at any time with:"
+    echo -e "  ${BLUE}./install.sh verify${NC}"
+    echo ""
     echo "For detailed documentation, see:"
     echo "  - README.md (overview)"
     echo "  - INSTALL.md (detailed guide)"
@@ -311,6 +444,23 @@ print_summary() {
 
 # Main installation
 main() {
+    local arg
+    for arg in "$@"; do
+        case "$arg" in
+            verify)
+                verify_installation
+                ;;
+            --force|-f)
+                FORCE_INSTALL=true
+                ;;
+            *)
+                echo -e "${RED}Error:${NC} Unknown argument '$arg'"
+                echo "Usage: sudo $0 [--force] | $0 verify"
+                exit 1
+                ;;
+        esac
+    done
+
     check_root
     print_header
     check_dependencies
@@ -320,7 +470,15 @@ main() {
     install_config_example
     install_polkit
     install_systemd_service
+    install_session_watcher
+    write_manifest
     check_audio_group
+
+    if [ "$INSTALL_FAILED" = true ]; then
+        echo ""
+        echo -e "${RED}Error:${NC} Some files could not be installed (see above)"
+        exit 1
+    fi
     print_summary
 }
 
@@ -4,6 +4,8 @@
 # MOTU M4 JACK Display Detection Helper
 # =============================================================================
 # Automatically detects the active X11 DISPLAY for JACK operations.
+# Uses the logind session resolver (motu-m4-session.sh) when available and
+# falls back to who/process/socket scanning otherwise.
 # Can be sourced as a library or run standalone for display analysis.
 #
 # Copyright (C) 2025
@@ -16,6 +18,13 @@ GREEN='\033[0;32m'
 BLUE='\033[0;34m'
 NC='\033[0m' # No Color
 
+# Session resolver (logind-based, cached)
+SESSION_LIB="$(dirname "${BASH_SOURCE[0]}")/motu-m4-session.sh"
+if [ -f "$SESSION_LIB" ]; then
+    # shellcheck source=/dev/null
+    . "$SESSION_LIB"
+fi
+
 # =============================================================================
 # Display Detection Function
 # =============================================================================
@@ -25,6 +34,13 @@ detect_display() {
     local user="$1"
     local display=""
 
+    # Method 0: Active logind session (X11 display or Xwayland on Wayland)
+    if declare -F resolve_session > /dev/null && resolve_session && \
+       { [ -z "$user" ] || [ "$user" = "$SESSION_USER" ]; } && [ -n "$SESSION_DISPLAY" ]; then
+        echo "$SESSION_DISPLAY"
+        return 0
+    fi
+
     # Method 1: Extract from who command
     local who_display
     who_display=$(who | grep "($user)" | grep "(:" | head -n1 | sed 's/.*(\(:[0-9]*\)).*/\1/' | grep -o ':[0-9]*')
@@ -179,7 +195,10 @@ if [ "${BASH_SOURCE[0]}" = "${0}" ]; then
             ;;
         "")
             # No parameters: detect for current active user
-            active_user=$(who | grep "(:" | head -n1 | awk '{print $1}')
+            active_user=""
+            if declare -F resolve_session > /dev/null && resolve_session; then
+                active_user="$SESSION_USER"
+            fi
             if [ -n "$active_user" ]; then
                 detect_display "$active_user"
             else
@@ -0,0 +1,80 @@
+#!/bin/bash
+
+# =============================================================================
+# MOTU M4 JACK Starter - Shared Installer Functions
+# =============================================================================
+# Sourced by install.sh and scripts/install-gui.sh (not installed).
+#
+# Installed files are recorded in /etc/motu-m4/install-manifest (sha256sum
+# format: "<hash>  <installed path>"). A file is copied again when the
+# installed file differs from the source, so local modifications are
+# repaired as well.
+#
+# Expects the color variables and FORCE_INSTALL of the calling script.
+#
+# Copyright (C) 2026
+# License: GPL-3.0-or-later
+# =============================================================================
+
+MANIFEST_FILE="/etc/motu-m4/install-manifest"
+
+# Manifest entries of this run
+MANIFEST_ENTRIES=()
+
+# Set when a file could not be installed
+INSTALL_FAILED=false
+
+# Install a file only if the installed file differs from the source
+# Returns 0 if the file was copied, 1 if it was unchanged, 2 if it failed
+install_file() {
+    local src="$1"
+    local dest="$2"
+    local mode="$3"
+    local src_hash
+    src_hash=$(sha256sum "$src" | awk '{print $1}')
+
+    if [ "$FORCE_INSTALL" = false ] && [ -f "$dest" ] && \
+       [ "$(sha256sum "$dest" | awk '{print $1}')" = "$src_hash" ]; then
+        MANIFEST_ENTRIES+=("$src_hash  $dest")
+        return 1
+    fi
+
+    if ! cp "$src" "$dest"; then
+        echo -e "  ${RED}✗${NC} Failed to install $dest"
+        # shellcheck disable=SC2034  # checked by the calling script
+        INSTALL_FAILED=true
+        return 2
+    fi
+    chmod "$mode" "$dest"
+    # Only recorded once the file is really in place
+    MANIFEST_ENTRIES+=("$src_hash  $dest")
+    return 0
+}
+
+# Print install result for a file (status of install_file). Failures were
+# already reported by install_file.
+print_install_result() {
+    local status="$1"
+    local name="$2"
+    case "$status" in
+        0) echo -e "  ${GREEN}✓${NC} $name" ;;
+        1) echo -e "  ${BLUE}=${NC} $name (unchanged)" ;;
+    esac
+}
+
+# Merge entries of this run into the manifest
+write_manifest() {
+    [ "${#MANIFEST_ENTRIES[@]}" -gt 0 ] || return 0
+    mkdir -p "$(dirname "$MANIFEST_FILE")"
+    local tmp="$MANIFEST_FILE.tmp"
+    {
+        if [ -f "$MANIFEST_FILE" ]; then
+            # Keep entries of files not handled in this run
+            printf '%s\n' "${MANIFEST_ENTRIES[@]}" | \
+                awk 'NR == FNR { seen[$2] = 1; next } !($2 in seen)' - "$MANIFEST_FILE"
+        fi
+        printf '%s\n' "${MANIFEST_ENTRIES[@]}"
+    } > "$tmp"
+    chmod 644 "$tmp"
+    mv -f "$tmp" "$MANIFEST_FILE"
+}
@@ -5,7 +5,10 @@
 # =============================================================================
 # Installs the GUI application for MOTU M4 JACK settings management.
 #
-# Usage: sudo ./install-gui.sh
+# Usage: sudo ./install-gui.sh [--force]
+#
+# Installed files are recorded in /etc/motu-m4/install-manifest (shared with
+# install.sh). Only files whose installed copy differs are copied again.
 #
 # Copyright (C) 2025
 # License: GPL-3.0-or-later
@@ -18,6 +21,12 @@ YELLOW='\033[1;33m'
 BLUE='\033[0;34m'
 NC='\033[0m'
 
+# Copy all files regardless of manifest (--force)
+FORCE_INSTALL=false
+if [ "$1" = "--force" ] || [ "$1" = "-f" ]; then
+    FORCE_INSTALL=true
+fi
+
 # =============================================================================
 # Root Privilege Check
 # =============================================================================
@@ -39,6 +48,10 @@ echo ""
 # Detect script directory (parent directory since we are in scripts/)
 SCRIPT_DIR="$(cd "$(dirname "${BASH_SOURCE[0]}")/.." && pwd)"
 
+# Manifest and file install functions (shared with install.sh)
+# shellcheck source=scripts/install-common.sh
+. "$SCRIPT_DIR/scripts/install-common.sh"
+
 # =============================================================================
 # Dependency Check
 # =============================================================================
@@ -74,9 +87,12 @@ echo ""
 echo -e "${YELLOW}Installing GUI script...${NC}"
 
 if [ -f "$SCRIPT_DIR/gui/motu-m4-jack-gui.py" ]; then
-    cp "$SCRIPT_DIR/gui/motu-m4-jack-gui.py" /usr/local/bin/
-    chmod +x /usr/local/bin/motu-m4-jack-gui.py
-    echo -e "${GREEN}✓ GUI script installed to /usr/local/bin/motu-m4-jack-gui.py${NC}"
+    install_file "$SCRIPT_DIR/gui/motu-m4-jack-gui.py" /usr/local/bin/motu-m4-jack-gui.py 755
+    case $? in
+        0) echo -e "${GREEN}✓ GUI script installed to /usr/local/bin/motu-m4-jack-gui.py${NC}" ;;
+        1) echo -e "${BLUE}= GUI script unchanged${NC}" ;;
+        *) exit 1 ;;
+    esac
 else
     echo -e "${RED}Error:${NC} motu-m4-jack-gui.py not found in $SCRIPT_DIR/gui"
     exit 1
@@ -90,14 +106,21 @@ echo ""
 echo -e "${YELLOW}Installing desktop entry...${NC}"
 
 if [ -f "$SCRIPT_DIR/system/motu-m4-jack-settings.desktop" ]; then
-    cp "$SCRIPT_DIR/system/motu-m4-jack-settings.desktop" /usr/share/applications/
-    chmod 644 /usr/share/applications/motu-m4-jack-settings.desktop
-    echo -e "${GREEN}✓ Desktop entry installed${NC}"
-
-    # Update desktop database
-    if command -v update-desktop-database &> /dev/null; then
-        update-desktop-database /usr/share/applications/ 2>/dev/null
-    fi
+    install_file "$SCRIPT_DIR/system/motu-m4-jack-settings.desktop" \
+        /usr/share/applications/motu-m4-jack-settings.desktop 644
+    case $? in
+        0)
+            echo -e "${GREEN}✓ Desktop entry installed${NC}"
+
+            # Update desktop database (only if the entry changed)
+            if command -v update-desktop-database &> /dev/null; then
+                update-desktop-database /usr/share/applications/ 2>/dev/null
+            fi
+            ;;
+        1)
+            echo -e "${BLUE}= Desktop entry unchanged${NC}"
+            ;;
+    esac
 else
     echo -e "${YELLOW}Warning:${NC} motu-m4-jack-settings.desktop not found - skipped"
 fi
@@ -112,14 +135,21 @@ echo -e "${YELLOW}Installing icon...${NC}"
 if [ -f "$SCRIPT_DIR/gui/motu-m4-jack-settings.svg" ]; then
     # Create hicolor icon directory if not present
     mkdir -p /usr/share/icons/hicolor/scalable/apps/
-    cp "$SCRIPT_DIR/gui/motu-m4-jack-settings.svg" /usr/share/icons/hicolor/scalable/apps/
-    chmod 644 /usr/share/icons/hicolor/scalable/apps/motu-m4-jack-settings.svg
-    echo -e "${GREEN}✓ Icon installed${NC}"
-
-    # Update icon cache
-    if command -v gtk-update-icon-cache &> /dev/null; then
-        gtk-update-icon-cache -f /usr/share/icons/hicolor/ 2>/dev/null
-    fi
+    install_file "$SCRIPT_DIR/gui/motu-m4-jack-settings.svg" \
+        /usr/share/icons/hicolor/scalable/apps/motu-m4-jack-settings.svg 644
+    case $? in
+        0)
+            echo -e "${GREEN}✓ Icon installed${NC}"
+
+            # Update icon cache (only if the icon changed)
+            if command -v gtk-update-icon-cache &> /dev/null; then
+                gtk-update-icon-cache -f /usr/share/icons/hicolor/ 2>/dev/null
+            fi
+            ;;
+        1)
+            echo -e "${BLUE}= Icon unchanged${NC}"
+            ;;
+    esac
 else
     echo -e "${YELLOW}Warning:${NC} motu-m4-jack-settings.svg not found - skipped"
     echo "  The GUI will use the default 'audio-card' icon."
@@ -133,9 +163,13 @@ echo ""
 echo -e "${YELLOW}Installing Polkit rule...${NC}"
 
 if [ -f "$SCRIPT_DIR/system/50-motu-m4-jack-settings.rules" ]; then
-    cp "$SCRIPT_DIR/system/50-motu-m4-jack-settings.rules" /etc/polkit-1/rules.d/
-    chmod 644 /etc/polkit-1/rules.d/50-motu-m4-jack-settings.rules
-    echo -e "${GREEN}✓ Polkit rule installed${NC}"
+    # polkitd watches its rules directory, no explicit reload needed
+    install_file "$SCRIPT_DIR/system/50-motu-m4-jack-settings.rules" \
+        /etc/polkit-1/rules.d/50-motu-m4-jack-settings.rules 644
+    case $? in
+        0) echo -e "${GREEN}✓ Polkit rule installed${NC}" ;;
+        1) echo -e "${BLUE}= Polkit rule unchanged${NC}" ;;
+    esac
     echo -e "  ${BLUE}Info:${NC} Members of 'audio' group can change settings without password"
 
     # Check if current user is in audio group
@@ -152,6 +186,18 @@ else
     echo "  The GUI will prompt for password on each settings change."
 fi
 
+# =============================================================================
+# Install Manifest
+# =============================================================================
+
+write_manifest
+
+if [ "$INSTALL_FAILED" = true ]; then
+    echo ""
+    echo -e "${RED}Error:${NC} Some files could not be installed (see above)"
+    exit 1
+fi
+
 # =============================================================================
 # System Scripts Check
 # =============================================================================
@@ -33,6 +33,18 @@ USER_ID=$(id -u)
 
 log "User: $USER (ID: $USER_ID)"
 
+# Session environment (display, runtime dir, bus) from the session resolver
+SESSION_LIB="/usr/local/bin/motu-m4-session.sh"
+SESSION_FOUND=false
+if [ -f "$SESSION_LIB" ]; then
+    # shellcheck source=/dev/null
+    . "$SESSION_LIB"
+    if resolve_session && [ "$SESSION_UID" = "$USER_ID" ]; then
+        SESSION_FOUND=true
+        log "Session: ${SESSION_ID:-?} ($SESSION_TYPE, DISPLAY=${SESSION_DISPLAY:-none}, WAYLAND_DISPLAY=${SESSION_WAYLAND_DISPLAY:-none})"
+    fi
+fi
+
 # =============================================================================
 # Configuration Loading
 # =============================================================================
@@ -85,10 +97,13 @@ log "Starting JACK directly for user: $USER"
 # User Context Execution
 # =============================================================================
 
-# Set environment variables
-export DISPLAY=:1
-export DBUS_SESSION_BUS_ADDRESS=unix:path=$DBUS_SOCKET
-export XDG_RUNTIME_DIR=/run/user/$USER_ID
+# Set environment variables (keep the inherited display if no session was found)
+if [ "$SESSION_FOUND" = true ]; then
+    session_export_env
+else
+    export DBUS_SESSION_BUS_ADDRESS=unix:path=$DBUS_SOCKET
+    export XDG_RUNTIME_DIR=/run/user/$USER_ID
+fi
 
 # Execute JACK initialization script directly (we are already the correct user)
 /usr/local/bin/motu-m4-jack-init.sh >> $LOG 2>&1
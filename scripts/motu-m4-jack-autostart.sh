@@ -30,20 +30,25 @@ log "M4 Audio Interface detected - Starting JACK directly"
 # User Detection
 # =============================================================================
 
-# Dynamic detection of active user (flexible X11 session detection)
-ACTIVE_USER=$(who | grep "(:" | head -n1 | awk '{print $1}')
+# Session resolver (logind-based, cached)
+SESSION_LIB="/usr/local/bin/motu-m4-session.sh"
+if [ ! -f "$SESSION_LIB" ]; then
+    log "ERROR: Session resolver not found: $SESSION_LIB"
+    exit 1
+fi
+# shellcheck source=/dev/null
+. "$SESSION_LIB"
 
-# Fallback: If no active user detected, exit script
-if [ -z "$ACTIVE_USER" ]; then
+# Active graphical session on seat0 (X11 or Wayland)
+if ! resolve_session; then
     log "ERROR: No active user detected - cannot start JACK"
     exit 1
 fi
-USER="$ACTIVE_USER"
-
-log "Detected active user: $USER"
+USER="$SESSION_USER"
+USER_ID="$SESSION_UID"
+USER_HOME="$SESSION_HOME"
 
-USER_ID=$(id -u "$USER")
-USER_HOME=$(getent passwd "$USER" | cut -d: -f6)
+log "Detected active user: $USER (session ${SESSION_ID:-?}, $SESSION_TYPE, DISPLAY=${SESSION_DISPLAY:-none}, WAYLAND_DISPLAY=${SESSION_WAYLAND_DISPLAY:-none})"
 
 if [ -z "$USER_ID" ]; then
     log "User $USER not found"
@@ -54,13 +59,13 @@ fi
 # User Session Verification
 # =============================================================================
 
-# Check if user is fully logged in
-if ! who | grep -q "^$USER "; then
+# The runtime dir is created by logind once the login has completed
+if [ ! -d "$SESSION_RUNTIME_DIR" ]; then
     log "User $USER not yet logged in. Waiting 30 seconds..."
     sleep 30
 
     # Check again
-    if ! who | grep -q "^$USER "; then
+    if [ ! -d "$SESSION_RUNTIME_DIR" ]; then
         log "User still not logged in after waiting. Aborting."
         exit 1
     fi
@@ -97,7 +102,7 @@ fi
 # =============================================================================
 
 # Wait for DBUS socket to become available
-DBUS_SOCKET="/run/user/$USER_ID/bus"
+DBUS_SOCKET="$SESSION_RUNTIME_DIR/bus"
 WAIT_TIME=0
 
 log "Checking DBUS socket: $DBUS_SOCKET (timeout: ${DBUS_TIMEOUT}s)"
@@ -119,12 +124,12 @@ log "Starting JACK directly for user: $USER (ID: $USER_ID)"
 # =============================================================================
 
 # Set environment variables for user context
-export DISPLAY=:1
-export DBUS_SESSION_BUS_ADDRESS=unix:path=$DBUS_SOCKET
-export XDG_RUNTIME_DIR=/run/user/$USER_ID
+session_export_env
 export HOME=$USER_HOME
 
-# Execute JACK initialization script as user
-runuser -l "$USER" -c "/usr/local/bin/motu-m4-jack-init.sh" >> $LOG 2>&1
+# Execute JACK initialization script as user (login shell starts with a
+# clean environment, so the session variables are passed explicitly)
+runuser -l "$USER" -c "$(session_env_exports)
+/usr/local/bin/motu-m4-jack-init.sh" >> $LOG 2>&1
 
 log "JACK startup command completed"
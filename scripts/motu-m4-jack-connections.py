@@ -0,0 +1,343 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+MOTU M4 JACK Connection Graph Snapshot/Restore
+Saves the JACK port connection graph before JACK is stopped and restores
+it in one batch after JACK has been restarted.
+
+The snapshot is a compact JSON file keyed by client and port name:
+
+    {"version": 1, "saved": 1760000000.0,
+     "graph": {"system": {"capture_1": ["ardour:Audio 1/audio_in 1"]}}}
+
+Only output -> input edges are stored, so every connection appears once.
+
+Restore uses a single long-lived JACK client (python3-jack-client) that
+waits for clients to reappear and connects each edge as soon as both ports
+exist. Without the jack module, jack_lsp/jack_connect are used as fallback.
+
+Usage:
+  motu-m4-jack-connections.py save [--file PATH]
+  motu-m4-jack-connections.py restore [--file PATH] [--timeout SECONDS]
+
+Copyright (C) 2026
+License: GPL-3.0-or-later
+"""
+
+import argparse
+import errno
+import json
+import logging
+import os
+import subprocess
+import sys
+import threading
+import time
+
+try:
+    import jack
+except ImportError:
+    jack = None
+
+# Snapshot location (consistent with other runtime files)
+SNAPSHOT_FILE = "/run/motu-m4/jack-connections.json"
+SNAPSHOT_VERSION = 1
+CLIENT_NAME = "motu-m4-connections"
+
+logging.basicConfig(
+    level=logging.INFO,
+    format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
+)
+logger = logging.getLogger("motu-m4-jack-connections")
+
+
+def split_port_name(full_name):
+    """Splits 'client:port' into (client, port) - port names may contain ':'"""
+    client, _, port = full_name.partition(":")
+    return client, port
+
+
+def graph_to_edges(graph):
+    """Flattens the nested snapshot graph into a list of (source, destination)"""
+    edges = []
+    for client, ports in graph.items():
+        for port, destinations in ports.items():
+            source = f"{client}:{port}"
+            for destination in destinations:
+                edges.append((source, destination))
+    return edges
+
+
+def edges_to_graph(edges):
+    """Builds the nested snapshot graph from (source, destination) pairs"""
+    graph = {}
+    for source, destination in edges:
+        client, port = split_port_name(source)
+        graph.setdefault(client, {}).setdefault(port, []).append(destination)
+    return graph
+
+
+def jack_errors():
+    """Exception types raised when the JACK server is not reachable"""
+    if jack is not None:
+        return (jack.JackError,)
+    return ()
+
+
+# =============================================================================
+# Snapshot
+# =============================================================================
+
+
+def read_edges_jack():
+    """Reads all output -> input connections via the JACK client library"""
+    client = jack.Client(CLIENT_NAME, no_start_server=True)
+    try:
+        edges = []
+        for port in client.get_ports(is_output=True):
+            for peer in client.get_all_connections(port):
+                edges.append((port.name, peer.name))
+        return edges
+    finally:
+        client.close()
+
+
+def read_edges_jack_lsp():
+    """Reads all output -> input connections by parsing 'jack_lsp -c -p'"""
+    result = subprocess.run(
+        ["jack_lsp", "-c", "-p"], capture_output=True, text=True, timeout=10
+    )
+    edges = []
+    current_port = None
+    peers = []
+    for line in result.stdout.splitlines():
+        if not line.startswith((" ", "\t")):
+            current_port = line.strip()
+            peers = []
+        elif line.strip().startswith("properties:"):
+            # Connections are listed before the properties line
+            if "output" in line:
+                edges.extend((current_port, peer) for peer in peers)
+        elif current_port:
+            peers.append(line.strip())
+    return edges
+
+
+def save_snapshot(path):
+    """Saves the current connection graph to path, returns number of edges"""
+    try:
+        if jack is not None:
+            edges = read_edges_jack()
+        else:
+            logger.info("jack module not available - falling back to jack_lsp")
+            edges = read_edges_jack_lsp()
+    except jack_errors() as e:
+        logger.warning("JACK not reachable, no snapshot taken: %s", str(e))
+        return 0
+    except FileNotFoundError:
+        logger.error("jack_lsp command not found - JACK tools may not be installed")
+        return 0
+    except subprocess.TimeoutExpired:
+        logger.error("jack_lsp timed out after 10 seconds")
+        return 0
+
+    # An empty graph is saved too, so an older snapshot is never replayed
+    snapshot = {
+        "version": SNAPSHOT_VERSION,
+        "saved": time.time(),
+        "graph": edges_to_graph(edges),
+    }
+
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(snapshot, f, separators=(",", ":"))
+    os.replace(tmp_path, path)
+
+    logger.info("Saved %d connections to %s", len(edges), path)
+    return len(edges)
+
+
+# =============================================================================
+# Restore
+# =============================================================================
+
+
+def load_snapshot(path):
+    """Loads a snapshot file, returns list of edges (empty if unusable)"""
+    try:
+        with open(path, "r") as f:
+            snapshot = json.load(f)
+    except FileNotFoundError:
+        logger.info("No connection snapshot found at %s", path)
+        return []
+    except (ValueError, OSError) as e:
+        logger.error("Failed to read connection snapshot %s: %s", path, str(e))
+        return []
+
+    if snapshot.get("version") != SNAPSHOT_VERSION:
+        logger.warning("Unsupported snapshot version: %s", snapshot.get("version"))
+        return []
+
+    return graph_to_edges(snapshot.get("graph", {}))
+
+
+def restore_edges_jack(edges, timeout):
+    """Connects edges with one JACK client, waiting for ports to reappear.
+
+    Returns the list of edges that could not be restored before timeout.
+    """
+    client = jack.Client(CLIENT_NAME, no_start_server=True)
+    ports_changed = threading.Event()
+
+    def on_port_registration(port, register):
+        if register:
+            ports_changed.set()
+
+    client.set_port_registration_callback(on_port_registration)
+    client.activate()
+
+    pending = list(edges)
+    deadline = time.monotonic() + timeout
+    try:
+        while pending:
+            ports_changed.clear()
+            available = {port.name for port in client.get_ports()}
+            remaining = []
+            for source, destination in pending:
+                if source in available and destination in available:
+                    try:
+                        client.connect(source, destination)
+                    except jack.JackErrorCode as e:
+                        # Clients may re-create their own connections first
+                        if e.code != errno.EEXIST:
+                            logger.warning(
+                                "Failed to connect %s -> %s: %s",
+                                source,
+                                destination,
+                                str(e),
+                            )
+                    except jack.JackError as e:
+                        logger.warning(
+                            "Failed to connect %s -> %s: %s", source, destination, str(e)
+                        )
+                else:
+                    remaining.append((source, destination))
+            pending = remaining
+
+            wait_time = deadline - time.monotonic()
+            if not pending or wait_time <= 0:
+                break
+            # Sleep until a client registers new ports (or timeout)
+            ports_changed.wait(wait_time)
+    finally:
+        client.deactivate()
+        client.close()
+
+    return pending
+
+
+def restore_edges_jack_connect(edges, timeout):
+    """Fallback restore using jack_lsp/jack_connect (one process per edge)"""
+    pending = list(edges)
+    deadline = time.monotonic() + timeout
+    while pending:
+        result = subprocess.run(
+            ["jack_lsp"], capture_output=True, text=True, timeout=10
+        )
+        available = set(result.stdout.splitlines())
+        remaining = []
+        for source, destination in pending:
+            if source in available and destination in available:
+                subprocess.run(
+                    ["jack_connect", source, destination],
+                    capture_output=True,
+                    timeout=10,
+                )
+            else:
+                remaining.append((source, destination))
+        pending = remaining
+        if not pending or time.monotonic() >= deadline:
+            break
+        time.sleep(1)
+    return pending
+
+
+def remove_snapshot(path):
+    """Removes the snapshot file (a missing file is fine)"""
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+    except OSError as e:
+        logger.warning("Could not remove snapshot %s: %s", path, str(e))
+
+
+def restore_snapshot(path, timeout):
+    """Restores the snapshot at path, returns True if all edges were restored"""
+    edges = load_snapshot(path)
+    # A snapshot is used for one restore attempt only - never replay it on a
+    # later start, whatever the outcome
+    remove_snapshot(path)
+    if not edges:
+        return True
+
+    logger.info("Restoring %d connections (timeout: %ds)...", len(edges), timeout)
+    start = time.monotonic()
+
+    try:
+        if jack is not None:
+            pending = restore_edges_jack(edges, timeout)
+        else:
+            logger.info("jack module not available - falling back to jack_connect")
+            pending = restore_edges_jack_connect(edges, timeout)
+    except jack_errors() as e:
+        logger.error("JACK not reachable, connections not restored: %s", str(e))
+        return False
+    except FileNotFoundError:
+        logger.error("jack_connect command not found - JACK tools may not be installed")
+        return False
+    except subprocess.TimeoutExpired:
+        logger.error("jack_lsp/jack_connect timed out")
+        return False
+
+    elapsed_ms = (time.monotonic() - start) * 1000
+    restored = len(edges) - len(pending)
+    logger.info(
+        "Restored %d/%d connections in %.0f ms", restored, len(edges), elapsed_ms
+    )
+
+    for source, destination in pending:
+        logger.info("Not restored (port missing): %s -> %s", source, destination)
+    return not pending
+
+
+# =============================================================================
+# Main Entry Point
+# =============================================================================
+
+
+def main():
+    """Main entry point"""
+    parser = argparse.ArgumentParser(
+        description="Save and restore the JACK port connection graph"
+    )
+    parser.add_argument("command", choices=["save", "restore"])
+    parser.add_argument("--file", default=SNAPSHOT_FILE, help="Snapshot file path")
+    parser.add_argument(
+        "--timeout",
+        type=int,
+        default=30,
+        help="Seconds to wait for clients to reappear during restore",
+    )
+    args = parser.parse_args()
+
+    if args.command == "save":
+        save_snapshot(args.file)
+        return 0
+
+    return 0 if restore_snapshot(args.file, args.timeout) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -14,6 +14,10 @@
 # Legacy format (v1.x) is still supported:
 #   JACK_SETTING=1|2|3
 #
+# Usage: motu-m4-jack-init.sh [--preflight-only]
+#   --preflight-only  Resolve the configuration and run the pre-flight check
+#                     only (JACK is not touched; used by the restart script)
+#
 # Copyright (C) 2025
 # License: GPL-3.0-or-later
 # =============================================================================
@@ -24,6 +28,11 @@ LOG="/run/motu-m4/jack-init.log"
 # Ensure log directory exists
 mkdir -p /run/motu-m4 2>/dev/null || true
 
+PREFLIGHT_ONLY=false
+if [ "${1:-}" = "--preflight-only" ]; then
+    PREFLIGHT_ONLY=true
+fi
+
 # =============================================================================
 # Default Configuration
 # =============================================================================
@@ -31,6 +40,13 @@ DEFAULT_RATE=48000
 DEFAULT_PERIOD=256
 DEFAULT_NPERIODS=3
 DEFAULT_A2J_ENABLE=false
+DEFAULT_RESTORE_CONNECTIONS=true
+DEFAULT_RESTORE_TIMEOUT=30
+DEFAULT_PERF_LOG_ENABLE=true
+DEFAULT_MIDI_DRIVER=none
+DEFAULT_A2J_RT_PRIORITY=5
+DEFAULT_MIDI_STATS_ENABLE=false
+DEFAULT_POWER_PROFILE_ENABLE=false
 
 # =============================================================================
 # Legacy Presets (for backward compatibility with v1.x)
@@ -62,8 +78,12 @@ if [ -n "$SUDO_USER" ] && [ "$SUDO_USER" != "root" ]; then
 elif [ "$(whoami)" != "root" ]; then
     ACTUAL_USER="$(whoami)"
 else
-    # Fallback: Detect active desktop user
-    ACTUAL_USER=$(who | grep "(:" | head -n1 | awk '{print $1}')
+    # Fallback: Detect active desktop user (logind session resolver)
+    if [ -f /usr/local/bin/motu-m4-session.sh ]; then
+        # shellcheck source=/dev/null
+        . /usr/local/bin/motu-m4-session.sh
+        resolve_session && ACTUAL_USER="$SESSION_USER"
+    fi
 fi
 
 if [ -n "$ACTUAL_USER" ] && [ "$ACTUAL_USER" != "root" ]; then
@@ -165,10 +185,24 @@ load_config_from_file() {
         local period
         local nperiods
         local a2j_enable
+        local restore_connections
+        local restore_timeout
+        local perf_log_enable
+        local midi_driver
+        local a2j_rt_priority
+        local midi_stats_enable
+        local power_profile_enable
         rate=$(read_config_value "$config_file" "JACK_RATE")
         period=$(read_config_value "$config_file" "JACK_PERIOD")
         nperiods=$(read_config_value "$config_file" "JACK_NPERIODS")
         a2j_enable=$(read_config_value "$config_file" "A2J_ENABLE")
+        restore_connections=$(read_config_value "$config_file" "JACK_RESTORE_CONNECTIONS")
+        restore_timeout=$(read_config_value "$config_file" "JACK_RESTORE_TIMEOUT")
+        perf_log_enable=$(read_config_value "$config_file" "PERF_LOG_ENABLE")
+        midi_driver=$(read_config_value "$config_file" "JACK_MIDI_DRIVER")
+        a2j_rt_priority=$(read_config_value "$config_file" "A2J_RT_PRIORITY")
+        midi_stats_enable=$(read_config_value "$config_file" "MIDI_STATS_ENABLE")
+        power_profile_enable=$(read_config_value "$config_file" "POWER_PROFILE_ENABLE")
 
         if [ -n "$rate" ]; then
             ACTIVE_RATE="$rate"
@@ -182,6 +216,27 @@ load_config_from_file() {
         if [ -n "$a2j_enable" ]; then
             ACTIVE_A2J_ENABLE="$a2j_enable"
         fi
+        if [ -n "$restore_connections" ]; then
+            ACTIVE_RESTORE_CONNECTIONS="$restore_connections"
+        fi
+        if [ -n "$restore_timeout" ]; then
+            ACTIVE_RESTORE_TIMEOUT="$restore_timeout"
+        fi
+        if [ -n "$perf_log_enable" ]; then
+            ACTIVE_PERF_LOG_ENABLE="$perf_log_enable"
+        fi
+        if [ -n "$midi_driver" ]; then
+            ACTIVE_MIDI_DRIVER="$midi_driver"
+        fi
+        if [ -n "$a2j_rt_priority" ]; then
+            ACTIVE_A2J_RT_PRIORITY="$a2j_rt_priority"
+        fi
+        if [ -n "$midi_stats_enable" ]; then
+            ACTIVE_MIDI_STATS_ENABLE="$midi_stats_enable"
+        fi
+        if [ -n "$power_profile_enable" ]; then
+            ACTIVE_POWER_PROFILE_ENABLE="$power_profile_enable"
+        fi
 
         log "Loaded v2.0 config from $config_file: Rate=$ACTIVE_RATE, Period=$ACTIVE_PERIOD, Nperiods=$ACTIVE_NPERIODS, A2J=$ACTIVE_A2J_ENABLE"
         return 0
@@ -210,6 +265,13 @@ ACTIVE_RATE=$DEFAULT_RATE
 ACTIVE_PERIOD=$DEFAULT_PERIOD
 ACTIVE_NPERIODS=$DEFAULT_NPERIODS
 ACTIVE_A2J_ENABLE=$DEFAULT_A2J_ENABLE
+ACTIVE_RESTORE_CONNECTIONS=$DEFAULT_RESTORE_CONNECTIONS
+ACTIVE_RESTORE_TIMEOUT=$DEFAULT_RESTORE_TIMEOUT
+ACTIVE_PERF_LOG_ENABLE=$DEFAULT_PERF_LOG_ENABLE
+ACTIVE_MIDI_DRIVER=$DEFAULT_MIDI_DRIVER
+ACTIVE_A2J_RT_PRIORITY=$DEFAULT_A2J_RT_PRIORITY
+ACTIVE_MIDI_STATS_ENABLE=$DEFAULT_MIDI_STATS_ENABLE
+ACTIVE_POWER_PROFILE_ENABLE=$DEFAULT_POWER_PROFILE_ENABLE
 
 # Configuration priority:
 # 1. Environment variables (JACK_RATE, JACK_PERIOD, JACK_NPERIODS)
@@ -276,6 +338,16 @@ if [ "$ACTIVE_NPERIODS" -lt 2 ] || [ "$ACTIVE_NPERIODS" -gt 8 ]; then
     log "WARNING: Nperiods $ACTIVE_NPERIODS outside typical range (2-8)"
 fi
 
+# Validate JACK MIDI driver
+case "$ACTIVE_MIDI_DRIVER" in
+    none|raw|seq)
+        ;;
+    *)
+        log "WARNING: Unknown JACK MIDI driver '$ACTIVE_MIDI_DRIVER' - using 'none'"
+        ACTIVE_MIDI_DRIVER=none
+        ;;
+esac
+
 # Calculate latency for logging
 LATENCY_MS=$(echo "scale=2; ($ACTIVE_PERIOD * $ACTIVE_NPERIODS) / $ACTIVE_RATE * 1000" | bc)
 ACTIVE_DESC="Custom (${ACTIVE_RATE}Hz, ${ACTIVE_NPERIODS}x${ACTIVE_PERIOD}, ~${LATENCY_MS}ms)"
@@ -289,7 +361,7 @@ log_config_debug() {
         echo "$(date): CONFIG DEBUG - USER_CONFIG_FILE: $USER_CONFIG_FILE"
         echo "$(date): CONFIG DEBUG - SYSTEM_CONFIG_FILE: $SYSTEM_CONFIG_FILE"
         echo "$(date): CONFIG DEBUG - Config source: $config_source"
-        echo "$(date): CONFIG DEBUG - Final config: Rate=$ACTIVE_RATE, Period=$ACTIVE_PERIOD, Nperiods=$ACTIVE_NPERIODS, A2J=$ACTIVE_A2J_ENABLE"
+        echo "$(date): CONFIG DEBUG - Final config: Rate=$ACTIVE_RATE, Period=$ACTIVE_PERIOD, Nperiods=$ACTIVE_NPERIODS, A2J=$ACTIVE_A2J_ENABLE, MIDI driver=$ACTIVE_MIDI_DRIVER"
         echo "$(date): CONFIG DEBUG - Calculated latency: ${LATENCY_MS}ms"
     } >> $LOG
 }
@@ -306,37 +378,166 @@ if ! aplay -l | grep -q "M4"; then
     fail "MOTU M4 Audio Interface not found. Please connect or power on the device."
 fi
 
+# =============================================================================
+# Last Known-Good Configuration
+# =============================================================================
+
+LAST_GOOD_FILE="$HOME/.local/share/motu-m4/last-known-good.conf"
+
+# Configure JACK parameters and start the server
+configure_and_start_jack() {
+    local rate="$1"
+    local period="$2"
+    local nperiods="$3"
+
+    jack_control ds alsa
+    jack_control dps device hw:M4,0
+    jack_control dps rate "$rate"
+    jack_control dps nperiods "$nperiods"
+    jack_control dps period "$period"
+    # 'raw' exposes ALSA rawmidi ports directly as JACK MIDI ports
+    jack_control dps midi-driver "$ACTIVE_MIDI_DRIVER"
+
+    jack_control start && jack_control status > /dev/null
+}
+
+# Remember a configuration that started successfully
+save_last_good() {
+    mkdir -p "$(dirname "$LAST_GOOD_FILE")" 2>/dev/null
+    {
+        echo "# Last configuration that started successfully ($(date))"
+        echo "JACK_RATE=$ACTIVE_RATE"
+        echo "JACK_PERIOD=$ACTIVE_PERIOD"
+        echo "JACK_NPERIODS=$ACTIVE_NPERIODS"
+    } > "$LAST_GOOD_FILE"
+}
+
+# Load the last known-good configuration into LAST_GOOD_*. Fails if there is
+# none or if it equals the active configuration (nothing to roll back to).
+read_last_good() {
+    LAST_GOOD_RATE=$(read_config_value "$LAST_GOOD_FILE" "JACK_RATE")
+    LAST_GOOD_PERIOD=$(read_config_value "$LAST_GOOD_FILE" "JACK_PERIOD")
+    LAST_GOOD_NPERIODS=$(read_config_value "$LAST_GOOD_FILE" "JACK_NPERIODS")
+
+    [ -n "$LAST_GOOD_RATE" ] && [ -n "$LAST_GOOD_PERIOD" ] && [ -n "$LAST_GOOD_NPERIODS" ] || return 1
+    [ "$LAST_GOOD_RATE/$LAST_GOOD_PERIOD/$LAST_GOOD_NPERIODS" != "$ACTIVE_RATE/$ACTIVE_PERIOD/$ACTIVE_NPERIODS" ]
+}
+
+# Switch the active configuration to the last known-good one
+# Arguments: reason the active configuration failed (for the final report)
+use_last_good() {
+    FAILED_DESC="$ACTIVE_DESC"
+    FAILED_REASON="$1"
+    ACTIVE_RATE="$LAST_GOOD_RATE"
+    ACTIVE_PERIOD="$LAST_GOOD_PERIOD"
+    ACTIVE_NPERIODS="$LAST_GOOD_NPERIODS"
+    LATENCY_MS=$(echo "scale=2; ($ACTIVE_PERIOD * $ACTIVE_NPERIODS) / $ACTIVE_RATE * 1000" | bc)
+    ACTIVE_DESC="Rollback (${ACTIVE_RATE}Hz, ${ACTIVE_NPERIODS}x${ACTIVE_PERIOD}, ~${LATENCY_MS}ms)"
+    ROLLED_BACK=true
+}
+
+ROLLED_BACK=false
+
+# =============================================================================
+# Pre-flight Check
+# =============================================================================
+
+# Reject unsupported rate/period/nperiods before the running server is stopped
+PREFLIGHT_LIB="/usr/local/bin/motu-m4-jack-preflight.sh"
+PREFLIGHT_AVAILABLE=false
+
+if [ -f "$PREFLIGHT_LIB" ]; then
+    # shellcheck source=/dev/null
+    . "$PREFLIGHT_LIB"
+    PREFLIGHT_AVAILABLE=true
+    if [ "$PREFLIGHT_ONLY" = true ]; then
+        if ! preflight_check "$ACTIVE_RATE" "$ACTIVE_PERIOD" "$ACTIVE_NPERIODS"; then
+            fail "Pre-flight check failed: $PREFLIGHT_ERROR"
+        fi
+        echo "Pre-flight check passed for $ACTIVE_DESC"
+        exit 0
+    fi
+    if ! preflight_check "$ACTIVE_RATE" "$ACTIVE_PERIOD" "$ACTIVE_NPERIODS"; then
+        log "ERROR: Pre-flight check failed for $ACTIVE_DESC: $PREFLIGHT_ERROR"
+        PREFLIGHT_FAILURE="$PREFLIGHT_ERROR"
+
+        # A running server is kept as it is. Without one (autostart, restart
+        # after shutdown) fall back to the last known-good configuration
+        # instead of leaving the system without audio.
+        if jack_control status 2>/dev/null | grep -q "started"; then
+            fail "Pre-flight check failed: $PREFLIGHT_FAILURE - JACK left unchanged"
+        fi
+        if ! read_last_good || \
+           ! preflight_check "$LAST_GOOD_RATE" "$LAST_GOOD_PERIOD" "$LAST_GOOD_NPERIODS"; then
+            fail "Pre-flight check failed: $PREFLIGHT_FAILURE (no usable last known-good configuration)"
+        fi
+
+        echo "Configuration not supported by the device - using last known-good configuration..."
+        log "Pre-flight rollback to last known-good: Rate=$LAST_GOOD_RATE, Period=$LAST_GOOD_PERIOD, Nperiods=$LAST_GOOD_NPERIODS"
+        use_last_good "was rejected by the pre-flight check ($PREFLIGHT_FAILURE)"
+    fi
+    log "Pre-flight check passed for ${ACTIVE_RATE}Hz, ${ACTIVE_NPERIODS}x${ACTIVE_PERIOD}"
+fi
+
+if [ "$PREFLIGHT_ONLY" = true ]; then
+    echo "Pre-flight check not available - nothing checked"
+    exit 0
+fi
+
 # =============================================================================
 # JACK Configuration and Start
 # =============================================================================
 
+CONNECTIONS_TOOL="/usr/local/bin/motu-m4-jack-connections.py"
+
 # Check JACK status and stop if running
 echo "Checking JACK status..."
 log "Checking JACK status..."
 if jack_control status 2>/dev/null | grep -q "started"; then
     echo "JACK is running - stopping for parameter configuration..."
     log "JACK is running - stopping for parameter configuration..."
+    # Snapshot the connection graph for the restore after the start
+    if [ -x "$CONNECTIONS_TOOL" ]; then
+        "$CONNECTIONS_TOOL" save >> $LOG 2>&1 || true
+    fi
     jack_control stop
     sleep 1
+
+    # Device is idle now - hardware ranges can be probed if not cached yet
+    if [ "$PREFLIGHT_AVAILABLE" = true ] && \
+       ! preflight_check "$ACTIVE_RATE" "$ACTIVE_PERIOD" "$ACTIVE_NPERIODS"; then
+        log "WARNING: Pre-flight check after stop failed: $PREFLIGHT_ERROR"
+    fi
 fi
 
 # Configure JACK parameters
 echo "Configuring JACK with $ACTIVE_DESC..."
 log "Configuring JACK: Rate=$ACTIVE_RATE, Periods=$ACTIVE_NPERIODS, Period=$ACTIVE_PERIOD"
 
-jack_control ds alsa
-jack_control dps device hw:M4,0
-jack_control dps rate "$ACTIVE_RATE"
-jack_control dps nperiods "$ACTIVE_NPERIODS"
-jack_control dps period "$ACTIVE_PERIOD"
-
 # Start JACK
 echo "Starting JACK server with new parameters..."
 log "Starting JACK server..."
-jack_control start || fail "JACK server could not be started"
+if configure_and_start_jack "$ACTIVE_RATE" "$ACTIVE_PERIOD" "$ACTIVE_NPERIODS"; then
+    # A pre-flight rollback keeps the rejected configuration as failed
+    [ "$ROLLED_BACK" = true ] || save_last_good
+else
+    log "ERROR: JACK could not be started with $ACTIVE_DESC"
+
+    # Automatic rollback to the last known-good configuration
+    if ! read_last_good; then
+        fail "JACK server could not be started (no other last known-good configuration)"
+    fi
 
-# Verify status
-jack_control status || fail "JACK server is not running correctly"
+    echo "Rolling back to last known-good configuration..."
+    log "Rolling back to last known-good: Rate=$LAST_GOOD_RATE, Period=$LAST_GOOD_PERIOD, Nperiods=$LAST_GOOD_NPERIODS"
+    jack_control stop 2>/dev/null || true
+    if ! configure_and_start_jack "$LAST_GOOD_RATE" "$LAST_GOOD_PERIOD" "$LAST_GOOD_NPERIODS"; then
+        fail "JACK server could not be started (rollback to last known-good configuration failed too)"
+    fi
+
+    use_last_good "could not be started"
+    log "Rollback successful: $ACTIVE_DESC"
+fi
 
 # =============================================================================
 # A2J MIDI Bridge (Optional)
@@ -379,6 +580,38 @@ check_a2j_bridge_active() {
     return 1
 }
 
+# Move the a2jmidid bridge threads to SCHED_FIFO. The thread created by
+# JACK for the a2j client is already real-time and keeps its priority; the
+# ALSA sequencer input thread (normal class) is raised, so MIDI events
+# reach JACK without being delayed by desktop load.
+set_a2j_rt_priority() {
+    local pid="$1"
+    local priority="$2"
+    local tid
+    local raised=0
+
+    if [ -z "$priority" ] || [ "$priority" -le 0 ] 2>/dev/null; then
+        log "A2J RT priority disabled (A2J_RT_PRIORITY=${priority:-unset})"
+        return 0
+    fi
+
+    for tid in $(ps -L -o tid=,cls= -p "$pid" 2>/dev/null | awk '$2 == "TS" {print $1}'); do
+        if chrt -f -p "$priority" "$tid" 2>/dev/null; then
+            raised=$((raised + 1))
+        fi
+    done
+
+    if [ "$raised" -gt 0 ]; then
+        echo "A2J is running with Real-Time priority $priority"
+        log "A2J: raised $raised thread(s) to SCHED_FIFO priority $priority (PID: $pid)"
+    elif ps -L -o cls= -p "$pid" 2>/dev/null | grep -q "FF"; then
+        log "A2J already running with Real-Time priority (PID: $pid)"
+    else
+        echo "A2J could not be set to Real-Time priority (check rtprio limits)"
+        log "WARNING: A2J RT priority $priority could not be set (PID: $pid) - check rtprio limits of the audio group"
+    fi
+}
+
 # Convert string to boolean
 case "${ACTIVE_A2J_ENABLE,,}" in
     true|yes|1|on)
@@ -404,19 +637,18 @@ if [ "$A2J_SHOULD_START" = true ]; then
         # Start A2J bridge
         safe_a2j_control --start || echo "A2J MIDI Bridge could not be started, possibly already active"
 
-        # Check and log Real-Time priority for a2j
         sleep 1  # Brief wait for a2j process to start
-        a2j_pid=$(pgrep a2j)
-        if [ -n "$a2j_pid" ]; then
-            rt_class=$(ps -o cls= -p "$a2j_pid" 2>/dev/null | tr -d ' ')
-            if [ "$rt_class" = "FF" ]; then
-                echo "A2J is running with Real-Time priority"
-                log "A2J running with Real-Time priority (PID: $a2j_pid)"
-            else
-                echo "A2J is running without Real-Time priority - this is normal"
-                log "A2J running without RT priority (PID: $a2j_pid, Class: $rt_class)"
-            fi
-        fi
+    fi
+
+    # Raise the bridge to Real-Time priority
+    a2j_pid=$(pgrep -x a2jmidid | head -n1)
+    if [ -n "$a2j_pid" ]; then
+        set_a2j_rt_priority "$a2j_pid" "$ACTIVE_A2J_RT_PRIORITY"
+    fi
+
+    if [ "$ACTIVE_MIDI_DRIVER" = "raw" ]; then
+        echo "Note: A2J and direct JACK MIDI are both enabled - M4 MIDI ports appear twice"
+        log "WARNING: A2J bridge and JACK MIDI driver 'raw' both enabled - hardware MIDI ports are duplicated"
     fi
 else
     echo "A2J MIDI Bridge disabled (A2J_ENABLE=false)"
@@ -433,6 +665,102 @@ else
     fi
 fi
 
+# =============================================================================
+# Connection Graph Restore
+# =============================================================================
+
+# Restore port connections saved by the shutdown script (or before the stop
+# above). Runs in the background with one JACK client that waits for
+# applications to reappear.
+case "${ACTIVE_RESTORE_CONNECTIONS,,}" in
+    true|yes|1|on)
+        if [ -x "$CONNECTIONS_TOOL" ]; then
+            log "Restoring JACK connections in background (timeout: ${ACTIVE_RESTORE_TIMEOUT}s)"
+            nohup "$CONNECTIONS_TOOL" restore --timeout="$ACTIVE_RESTORE_TIMEOUT" >> $LOG 2>&1 &
+        else
+            log "Connection restore tool not found: $CONNECTIONS_TOOL"
+        fi
+        ;;
+    *)
+        log "JACK connection restore disabled by configuration"
+        ;;
+esac
+
+# =============================================================================
+# Performance Log
+# =============================================================================
+
+# Record this JACK session (config, xruns, DSP load) into the persistent
+# performance log. The recorder exits by itself when JACK shuts down; the
+# shutdown script stops it earlier via its PID file.
+PERFLOG_TOOL="/usr/local/bin/motu-m4-jack-perflog.py"
+PERFLOG_PID_FILE="/run/motu-m4/perflog.pid"
+
+case "${ACTIVE_PERF_LOG_ENABLE,,}" in
+    true|yes|1|on)
+        if [ -x "$PERFLOG_TOOL" ]; then
+            log "Starting performance recorder"
+            nohup "$PERFLOG_TOOL" record --nperiods="$ACTIVE_NPERIODS" >> $LOG 2>&1 &
+            echo $! > "$PERFLOG_PID_FILE"
+        else
+            log "Performance recorder not found: $PERFLOG_TOOL"
+        fi
+        ;;
+    *)
+        log "Performance log disabled by configuration"
+        ;;
+esac
+
+# =============================================================================
+# MIDI Statistics
+# =============================================================================
+
+# Measure throughput and clock jitter of the hardware MIDI ports (a2j bridge
+# or direct JACK MIDI). Statistics are shown in the GUI next to the latency.
+MIDI_MONITOR_TOOL="/usr/local/bin/motu-m4-midi-monitor.py"
+MIDI_MONITOR_PID_FILE="/run/motu-m4/midi-monitor.pid"
+
+case "${ACTIVE_MIDI_STATS_ENABLE,,}" in
+    true|yes|1|on)
+        if [ "$A2J_SHOULD_START" != true ] && [ "$ACTIVE_MIDI_DRIVER" = "none" ]; then
+            log "MIDI statistics enabled, but neither A2J nor a JACK MIDI driver is active"
+        elif [ -x "$MIDI_MONITOR_TOOL" ]; then
+            log "Starting MIDI monitor"
+            nohup "$MIDI_MONITOR_TOOL" >> $LOG 2>&1 &
+            echo $! > "$MIDI_MONITOR_PID_FILE"
+        else
+            log "MIDI monitor not found: $MIDI_MONITOR_TOOL"
+        fi
+        ;;
+    *)
+        log "MIDI statistics disabled by configuration"
+        ;;
+esac
+
+# =============================================================================
+# Power Profile Switching
+# =============================================================================
+
+# Switch between performance and efficiency profile on AC/battery and
+# thermal changes. The watcher exits by itself when JACK is stopped; when it
+# restarts JACK itself, the new instance started here exits (single instance).
+# The watcher writes its own PID file once it holds the lock.
+POWER_PROFILE_TOOL="/usr/local/bin/motu-m4-power-profile.sh"
+
+case "${ACTIVE_POWER_PROFILE_ENABLE,,}" in
+    true|yes|1|on)
+        if [ -x "$POWER_PROFILE_TOOL" ]; then
+            log "Starting power profile watcher"
+            nohup "$POWER_PROFILE_TOOL" watch "$ACTIVE_PERIOD" "$ACTIVE_NPERIODS" >> $LOG 2>&1 &
+        else
+            log "Power profile tool not found: $POWER_PROFILE_TOOL"
+        fi
+        ;;
+    *)
+        log "Power profile switching disabled by configuration"
+        ;;
+esac
+
 # =============================================================================
 # Success Message
 # =============================================================================
@@ -444,6 +772,14 @@ echo "  Buffer Size: $ACTIVE_PERIOD frames"
 echo "  Periods: $ACTIVE_NPERIODS"
 echo "  Latency: ~${LATENCY_MS} ms"
 echo "  A2J MIDI Bridge: $ACTIVE_A2J_ENABLE"
+echo "  JACK MIDI Driver: $ACTIVE_MIDI_DRIVER"
 echo "=============================================="
 
 log "JACK Audio System started successfully: $ACTIVE_DESC (A2J: $ACTIVE_A2J_ENABLE)"
+
+# Report failed configuration after rollback (JACK is running nevertheless)
+if [ "$ROLLED_BACK" = true ]; then
+    echo "ERROR: $FAILED_DESC $FAILED_REASON - rolled back to last known-good configuration"
+    log "ERROR: $FAILED_DESC $FAILED_REASON - rolled back to last known-good configuration"
+    exit 2
+fi
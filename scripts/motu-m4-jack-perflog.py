@@ -0,0 +1,477 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+MOTU M4 JACK Performance Log
+Records JACK sessions with the active configuration (sample rate, buffer
+size, periods), xruns and DSP load into a small persistent SQLite store,
+so configurations can be compared across reboots.
+
+Storage: ~/.local/share/motu-m4/perf.db
+- sessions: one row per JACK run with config tuple, uptime, xruns and
+  DSP load percentiles
+- samples:  DSP load/xrun samples; raw samples older than RAW_RETENTION_DAYS
+  are downsampled into hourly buckets, hourly buckets older than
+  HOURLY_RETENTION_DAYS are deleted, and the number of sessions is capped
+
+Usage:
+  motu-m4-jack-perflog.py record [--nperiods N] [--interval SECONDS]
+  motu-m4-jack-perflog.py report [--days N] [--json]
+  motu-m4-jack-perflog.py compact
+
+Recording requires python3-jack-client.
+
+Copyright (C) 2026
+License: GPL-3.0-or-later
+"""
+
+import argparse
+import fcntl
+import json
+import logging
+import math
+import os
+import signal
+import sqlite3
+import sys
+import threading
+import time
+
+try:
+    import jack
+except ImportError:
+    jack = None
+
+# Storage location (same directory as GUI log)
+DATA_DIR = os.path.expanduser("~/.local/share/motu-m4")
+DB_FILE = os.path.join(DATA_DIR, "perf.db")
+LOCK_FILE = os.path.join(DATA_DIR, "perflog.lock")
+
+CLIENT_NAME = "motu-m4-perflog"
+
+# Sampling and persistence
+SAMPLE_INTERVAL = 5  # seconds between DSP load samples
+FLUSH_INTERVAL = 60  # seconds between database writes
+
+# Retention (bounded database size)
+RAW_RETENTION_DAYS = 7
+HOURLY_RETENTION_DAYS = 365
+MAX_SESSIONS = 5000
+DOWNSAMPLE_RESOLUTION = 3600
+
+logging.basicConfig(
+    level=logging.INFO,
+    format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
+)
+logger = logging.getLogger("motu-m4-jack-perflog")
+
+
+# =============================================================================
+# Database
+# =============================================================================
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (
+    id INTEGER PRIMARY KEY,
+    started REAL NOT NULL,
+    ended REAL NOT NULL,
+    rate INTEGER NOT NULL,
+    period INTEGER NOT NULL,
+    nperiods INTEGER NOT NULL,
+    xruns INTEGER NOT NULL DEFAULT 0,
+    load_p50 REAL,
+    load_p95 REAL,
+    load_max REAL
+);
+CREATE TABLE IF NOT EXISTS samples (
+    session_id INTEGER NOT NULL,
+    ts REAL NOT NULL,
+    resolution INTEGER NOT NULL,
+    load_avg REAL NOT NULL,
+    load_max REAL NOT NULL,
+    xruns INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS samples_ts ON samples (resolution, ts);
+CREATE INDEX IF NOT EXISTS sessions_config ON sessions (rate, period, nperiods);
+"""
+
+
+def open_db(path=DB_FILE):
+    """Opens (and initializes) the performance database"""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    conn = sqlite3.connect(path, timeout=10)
+    conn.execute("PRAGMA auto_vacuum = INCREMENTAL")
+    conn.execute("PRAGMA journal_mode = WAL")
+    conn.executescript(SCHEMA)
+    return conn
+
+
+def percentile(values, pct):
+    """Returns the pct-th percentile of values (nearest rank)"""
+    if not values:
+        return None
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, math.ceil(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def compact(conn, now=None):
+    """Downsamples old raw samples and enforces retention limits"""
+    if now is None:
+        now = time.time()
+    raw_cutoff = now - RAW_RETENTION_DAYS * 86400
+    hourly_cutoff = now - HOURLY_RETENTION_DAYS * 86400
+
+    with conn:
+        # Aggregate raw samples older than the raw retention into hourly buckets
+        conn.execute(
+            """
+            INSERT INTO samples (session_id, ts, resolution, load_avg, load_max, xruns)
+            SELECT session_id,
+                   CAST(ts / :res AS INTEGER) * :res,
+                   :res, AVG(load_avg), MAX(load_max), SUM(xruns)
+            FROM samples
+            WHERE resolution < :res AND ts < :cutoff
+            GROUP BY session_id, CAST(ts / :res AS INTEGER)
+            """,
+            {"res": DOWNSAMPLE_RESOLUTION, "cutoff": raw_cutoff},
+        )
+        conn.execute(
+            "DELETE FROM samples WHERE resolution < ? AND ts < ?",
+            (DOWNSAMPLE_RESOLUTION, raw_cutoff),
+        )
+        conn.execute("DELETE FROM samples WHERE ts < ?", (hourly_cutoff,))
+
+        # Cap number of sessions (oldest first) and drop their samples
+        conn.execute(
+            """
+            DELETE FROM sessions WHERE id NOT IN (
+                SELECT id FROM sessions ORDER BY started DESC LIMIT ?
+            )
+            """,
+            (MAX_SESSIONS,),
+        )
+        conn.execute(
+            "DELETE FROM samples WHERE session_id NOT IN (SELECT id FROM sessions)"
+        )
+    conn.execute("PRAGMA incremental_vacuum")
+
+
+# =============================================================================
+# Recording
+# =============================================================================
+
+
+class SessionRecorder:
+    """Samples DSP load and counts xruns for one JACK session"""
+
+    def __init__(self, conn, client, nperiods, interval):
+        self.conn = conn
+        self.client = client
+        self.nperiods = nperiods
+        self.interval = interval
+
+        self.lock = threading.Lock()
+        self.stop_event = threading.Event()
+        self.xruns_total = 0
+        self.xruns_pending = 0
+        self.loads = []
+        self.pending_samples = []
+
+        self.session_id = None
+        self.started = time.time()
+        self.period = None
+        self.blocksize_changed = threading.Event()
+
+    def on_xrun(self, delay):
+        """JACK xrun callback (runs in JACK notification thread)"""
+        with self.lock:
+            self.xruns_total += 1
+            self.xruns_pending += 1
+
+    def on_shutdown(self, status, reason):
+        """JACK shutdown callback"""
+        logger.info("JACK shut down: %s", reason)
+        self.stop_event.set()
+
+    def on_blocksize(self, blocksize):
+        """Buffer size changed at runtime (e.g. power profile switch)"""
+        if self.period is not None and blocksize != self.period:
+            self.blocksize_changed.set()
+
+    def start_session(self):
+        """Creates the session row for the current configuration"""
+        self.period = self.client.blocksize
+        with self.conn:
+            cursor = self.conn.execute(
+                """
+                INSERT INTO sessions (started, ended, rate, period, nperiods)
+                VALUES (?, ?, ?, ?, ?)
+                """,
+                (
+                    self.started,
+                    self.started,
+                    self.client.samplerate,
+                    self.period,
+                    self.nperiods,
+                ),
+            )
+        self.session_id = cursor.lastrowid
+        logger.info(
+            "Recording session %d: %d Hz, %d frames, %d periods",
+            self.session_id,
+            self.client.samplerate,
+            self.period,
+            self.nperiods,
+        )
+
+    def restart_session(self):
+        """Closes the current session and starts a new one (new buffer size)"""
+        self.flush()
+        with self.lock:
+            self.xruns_total = 0
+            self.xruns_pending = 0
+        self.loads = []
+        self.started = time.time()
+        self.start_session()
+
+    def sample(self):
+        """Takes one DSP load sample"""
+        load = self.client.cpu_load()
+        with self.lock:
+            xruns = self.xruns_pending
+            self.xruns_pending = 0
+        self.loads.append(load)
+        self.pending_samples.append(
+            (self.session_id, time.time(), self.interval, load, load, xruns)
+        )
+
+    def flush(self):
+        """Writes pending samples and updates session statistics"""
+        with self.lock:
+            xruns_total = self.xruns_total
+        with self.conn:
+            self.conn.executemany(
+                """
+                INSERT INTO samples (session_id, ts, resolution, load_avg, load_max, xruns)
+                VALUES (?, ?, ?, ?, ?, ?)
+                """,
+                self.pending_samples,
+            )
+            self.conn.execute(
+                """
+                UPDATE sessions
+                SET ended = ?, xruns = ?, load_p50 = ?, load_p95 = ?, load_max = ?
+                WHERE id = ?
+                """,
+                (
+                    time.time(),
+                    xruns_total,
+                    percentile(self.loads, 50),
+                    percentile(self.loads, 95),
+                    max(self.loads) if self.loads else None,
+                    self.session_id,
+                ),
+            )
+        self.pending_samples = []
+
+    def run(self):
+        """Samples until JACK shuts down or the recorder is stopped"""
+        self.start_session()
+        last_flush = time.monotonic()
+        while not self.stop_event.wait(self.interval):
+            try:
+                self.sample()
+            except jack.JackError as e:
+                logger.warning("Failed to sample DSP load: %s", str(e))
+                break
+            if self.blocksize_changed.is_set():
+                self.blocksize_changed.clear()
+                self.restart_session()
+                last_flush = time.monotonic()
+            elif time.monotonic() - last_flush >= FLUSH_INTERVAL:
+                self.flush()
+                last_flush = time.monotonic()
+        self.flush()
+        logger.info(
+            "Session %d ended: %.0f s uptime, %d xruns",
+            self.session_id,
+            time.time() - self.started,
+            self.xruns_total,
+        )
+
+
+def record(nperiods, interval):
+    """Records one JACK session, returns exit code"""
+    if jack is None:
+        logger.error("python3-jack-client not installed - performance log disabled")
+        return 1
+
+    os.makedirs(DATA_DIR, exist_ok=True)
+    lock_fd = open(LOCK_FILE, "w")
+    try:
+        fcntl.flock(lock_fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except BlockingIOError:
+        logger.info("Performance recorder already running")
+        return 0
+
+    try:
+        client = jack.Client(CLIENT_NAME, no_start_server=True)
+    except jack.JackError as e:
+        logger.error("JACK not reachable, nothing to record: %s", str(e))
+        return 1
+
+    conn = open_db()
+    compact(conn)
+
+    recorder = SessionRecorder(conn, client, nperiods, interval)
+    client.set_xrun_callback(recorder.on_xrun)
+    client.set_shutdown_callback(recorder.on_shutdown)
+    client.set_blocksize_callback(recorder.on_blocksize)
+
+    # Finish the session cleanly when stopped by the shutdown script
+    signal.signal(signal.SIGTERM, lambda signum, frame: recorder.stop_event.set())
+    signal.signal(signal.SIGINT, lambda signum, frame: recorder.stop_event.set())
+
+    client.activate()
+    try:
+        recorder.run()
+    finally:
+        try:
+            client.deactivate()
+            client.close()
+        except jack.JackError:
+            pass
+        conn.close()
+    return 0
+
+
+# =============================================================================
+# Reporting
+# =============================================================================
+
+
+def build_report(conn, days=None):
+    """Returns per-configuration statistics ranked by stability.
+
+    Configurations are ranked by xruns per hour, then by 95th percentile
+    DSP load. Percentiles are averaged over sessions, weighted by uptime.
+    """
+    where = ""
+    params = ()
+    if days:
+        where = "WHERE started >= ?"
+        params = (time.time() - days * 86400,)
+
+    rows = conn.execute(
+        f"""
+        SELECT rate, period, nperiods,
+               COUNT(*),
+               SUM(ended - started),
+               SUM(xruns),
+               SUM(load_p50 * (ended - started)) / NULLIF(SUM(ended - started), 0),
+               SUM(load_p95 * (ended - started)) / NULLIF(SUM(ended - started), 0),
+               MAX(load_max),
+               MAX(ended)
+        FROM sessions
+        {where}
+        GROUP BY rate, period, nperiods
+        """,
+        params,
+    ).fetchall()
+
+    report = []
+    for rate, period, nperiods, sessions, uptime, xruns, p50, p95, load_max, last in rows:
+        uptime = uptime or 0
+        hours = uptime / 3600
+        report.append(
+            {
+                "rate": rate,
+                "period": period,
+                "nperiods": nperiods,
+                "sessions": sessions,
+                "uptime_hours": round(hours, 2),
+                "xruns": xruns or 0,
+                "xruns_per_hour": round((xruns or 0) / hours, 2) if hours > 0 else None,
+                "load_p50": round(p50, 1) if p50 is not None else None,
+                "load_p95": round(p95, 1) if p95 is not None else None,
+                "load_max": round(load_max, 1) if load_max is not None else None,
+                "last_used": last,
+            }
+        )
+
+    report.sort(
+        key=lambda r: (
+            r["xruns_per_hour"] if r["xruns_per_hour"] is not None else float("inf"),
+            r["load_p95"] if r["load_p95"] is not None else float("inf"),
+        )
+    )
+    return report
+
+
+def print_report(report):
+    """Prints the ranked report as a table"""
+    if not report:
+        print("No performance data recorded yet.")
+        return
+    print(
+        f"{'#':>2}  {'Rate':>6}  {'Buffer':>6}  {'Per':>3}  {'Sess':>4}  "
+        f"{'Hours':>7}  {'Xruns':>6}  {'Xr/h':>6}  {'p50%':>5}  {'p95%':>5}"
+    )
+    for rank, r in enumerate(report, 1):
+        xruns_per_hour = "-" if r["xruns_per_hour"] is None else f"{r['xruns_per_hour']:.2f}"
+        p50 = "-" if r["load_p50"] is None else f"{r['load_p50']:.1f}"
+        p95 = "-" if r["load_p95"] is None else f"{r['load_p95']:.1f}"
+        print(
+            f"{rank:>2}  {r['rate']:>6}  {r['period']:>6}  {r['nperiods']:>3}  "
+            f"{r['sessions']:>4}  {r['uptime_hours']:>7.2f}  {r['xruns']:>6}  "
+            f"{xruns_per_hour:>6}  {p50:>5}  {p95:>5}"
+        )
+
+
+# =============================================================================
+# Main Entry Point
+# =============================================================================
+
+
+def main():
+    """Main entry point"""
+    parser = argparse.ArgumentParser(
+        description="Persistent JACK performance log for the MOTU M4"
+    )
+    parser.add_argument("command", choices=["record", "report", "compact"])
+    parser.add_argument(
+        "--nperiods", type=int, default=0, help="Periods of the running configuration"
+    )
+    parser.add_argument(
+        "--interval", type=int, default=SAMPLE_INTERVAL, help="Sample interval (seconds)"
+    )
+    parser.add_argument("--days", type=int, default=None, help="Only last N days")
+    parser.add_argument("--json", action="store_true", help="Output report as JSON")
+    args = parser.parse_args()
+
+    if args.command == "record":
+        return record(args.nperiods, args.interval)
+
+    try:
+        conn = open_db()
+    except sqlite3.Error as e:
+        logger.error("Cannot open performance database %s: %s", DB_FILE, str(e))
+        return 1
+
+    try:
+        if args.command == "compact":
+            compact(conn)
+            return 0
+
+        report = build_report(conn, args.days)
+        if args.json:
+            print(json.dumps(report))
+        else:
+            print_report(report)
+        return 0
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
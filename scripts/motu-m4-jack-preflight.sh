@@ -0,0 +1,239 @@
+#!/bin/bash
+
+# =============================================================================
+# MOTU M4 JACK Pre-flight Check
+# =============================================================================
+# Checks whether a sample rate / period / nperiods combination is supported
+# by the M4 before the running JACK server is stopped.
+#
+# Sources of truth:
+#   - /proc/asound/M4/stream0: supported sample rates (always available)
+#   - Hardware parameter ranges (period size, periods, buffer size), read by
+#     opening the idle device with 'aplay --dump-hw-params' on /dev/null.
+#     Nothing is played. Results are cached per device (USB ID), so the check
+#     also works while JACK holds the device.
+#
+# Can be sourced as a library or run standalone.
+#
+# Copyright (C) 2026
+# License: GPL-3.0-or-later
+# =============================================================================
+
+PREFLIGHT_CARD="M4"
+PREFLIGHT_DEVICE="hw:M4,0"
+PREFLIGHT_CACHE_DIR="/run/motu-m4"
+
+# Result of the last check (set by preflight_check)
+PREFLIGHT_ERROR=""
+
+# =============================================================================
+# Device Information
+# =============================================================================
+
+# Cache file for the connected device (keyed by USB vendor:product)
+preflight_cache_file() {
+    local usbid
+    usbid=$(cat "/proc/asound/$PREFLIGHT_CARD/usbid" 2>/dev/null | tr ':' '-')
+    echo "$PREFLIGHT_CACHE_DIR/hwparams-${usbid:-unknown}.cache"
+}
+
+# Sample rates supported in both directions (from USB stream info)
+probe_stream_rates() {
+    local stream_file="/proc/asound/$PREFLIGHT_CARD/stream0"
+    [ -f "$stream_file" ] || return 1
+
+    # Rates must be available for playback and capture; continuous rate
+    # ranges are not listed (no rate restriction is reported then)
+    awk '
+        /^Playback:/ { dir = "p"; has[dir] = 1 }
+        /^Capture:/  { dir = "c"; has[dir] = 1 }
+        /Rates:/ && dir != "" {
+            if ($0 ~ /continuous/) { continuous = 1; next }
+            line = $0
+            sub(/.*Rates:[ \t]*/, "", line)
+            gsub(/,/, " ", line)
+            n = split(line, r, " ")
+            for (i = 1; i <= n; i++) { rates[dir, r[i]] = 1; all[r[i]] = 1 }
+        }
+        END {
+            if (continuous) exit
+            for (x in all)
+                if ((!has["p"] || (("p", x) in rates)) && (!has["c"] || (("c", x) in rates)))
+                    print x
+        }
+    ' "$stream_file" | sort -n | tr '\n' ' '
+}
+
+# Check whether the PCM device is currently closed (not used by JACK etc.)
+device_is_idle() {
+    local status
+    for status in /proc/asound/"$PREFLIGHT_CARD"/pcm0[pc]/sub0/status; do
+        [ -f "$status" ] || continue
+        if [ "$(head -n1 "$status")" != "closed" ]; then
+            return 1
+        fi
+    done
+    return 0
+}
+
+# Read hardware parameter ranges from the idle device and write the cache
+probe_hw_params() {
+    local cache_file="$1"
+    local dump
+    local playback
+    local capture
+
+    # Raw input from /dev/null: parameters are dumped, no audio is played
+    playback=$(timeout 3 aplay -D "$PREFLIGHT_DEVICE" --dump-hw-params -t raw /dev/null 2>&1)
+    capture=$(timeout 3 arecord -D "$PREFLIGHT_DEVICE" --dump-hw-params -t raw -d 1 /dev/null 2>&1)
+    dump="$playback"$'\n'"$capture"
+
+    if ! echo "$dump" | grep -q "^PERIOD_SIZE:"; then
+        return 1
+    fi
+
+    # Use the intersection of playback and capture ranges
+    echo "$dump" | awk '
+        function keep(name, lo, hi) {
+            if (!(name in min) || lo > min[name]) min[name] = lo
+            if (!(name in max) || hi < max[name]) max[name] = hi
+        }
+        /^(PERIOD_SIZE|PERIODS|BUFFER_SIZE):/ {
+            name = $1; sub(/:$/, "", name)
+            line = $0; sub(/^[^:]*:[ \t]*/, "", line); sub(/[ \t]+$/, "", line)
+            # ALSA prints open interval bounds with parentheses: (15 65536]
+            lo_open = (line ~ /^\(/)
+            hi_open = (line ~ /\)$/)
+            gsub(/[][()]/, "", line)
+            split(line, v, " ")
+            if (v[2] == "") v[2] = v[1]
+            keep(name, v[1] + lo_open, v[2] - hi_open)
+        }
+        END {
+            for (n in min) printf "HW_%s_MIN=%d\nHW_%s_MAX=%d\n", n, min[n], n, max[n]
+        }
+    ' > "$cache_file.tmp" && mv -f "$cache_file.tmp" "$cache_file"
+}
+
+# =============================================================================
+# Pre-flight Check
+# =============================================================================
+
+# Check a configuration. Returns 0 if supported (or unknown), 1 otherwise.
+# On failure, PREFLIGHT_ERROR contains the reason.
+preflight_check() {
+    local rate="$1"
+    local period="$2"
+    local nperiods="$3"
+    PREFLIGHT_ERROR=""
+
+    if [ ! -d "/proc/asound/$PREFLIGHT_CARD" ]; then
+        PREFLIGHT_ERROR="MOTU M4 not found"
+        return 1
+    fi
+
+    # 1. Sample rate (from stream info)
+    local rates
+    rates=$(probe_stream_rates)
+    if [ -n "$rates" ] && ! echo " $rates " | grep -q " $rate "; then
+        PREFLIGHT_ERROR="Sample rate $rate Hz not supported by device (supported: ${rates% })"
+        return 1
+    fi
+
+    # 2. Period/buffer ranges (probe idle device, otherwise use cache)
+    local cache_file
+    cache_file=$(preflight_cache_file)
+    if [ ! -f "$cache_file" ] && device_is_idle; then
+        mkdir -p "$PREFLIGHT_CACHE_DIR" 2>/dev/null
+        probe_hw_params "$cache_file"
+    fi
+
+    if [ ! -f "$cache_file" ]; then
+        # No hardware ranges known yet (device busy) - rate check only
+        return 0
+    fi
+
+    local HW_PERIOD_SIZE_MIN="" HW_PERIOD_SIZE_MAX=""
+    local HW_PERIODS_MIN="" HW_PERIODS_MAX=""
+    local HW_BUFFER_SIZE_MIN="" HW_BUFFER_SIZE_MAX=""
+    # The cache directory is world-writable: parse known numeric keys only,
+    # never source the file (this check runs as root from the setting script)
+    local key value
+    while IFS='=' read -r key value; do
+        case "$key" in
+            HW_PERIOD_SIZE_MIN|HW_PERIOD_SIZE_MAX|HW_PERIODS_MIN|HW_PERIODS_MAX|HW_BUFFER_SIZE_MIN|HW_BUFFER_SIZE_MAX)
+                if [[ "$value" =~ ^[0-9]+$ ]]; then
+                    printf -v "$key" '%s' "$value"
+                fi
+                ;;
+        esac
+    done < "$cache_file"
+
+    if [ -n "$HW_PERIOD_SIZE_MIN" ] && \
+       { [ "$period" -lt "$HW_PERIOD_SIZE_MIN" ] || [ "$period" -gt "$HW_PERIOD_SIZE_MAX" ]; }; then
+        PREFLIGHT_ERROR="Buffer size $period not supported by device (range: $HW_PERIOD_SIZE_MIN-$HW_PERIOD_SIZE_MAX)"
+        return 1
+    fi
+
+    if [ -n "$HW_PERIODS_MIN" ] && \
+       { [ "$nperiods" -lt "$HW_PERIODS_MIN" ] || [ "$nperiods" -gt "$HW_PERIODS_MAX" ]; }; then
+        PREFLIGHT_ERROR="Periods $nperiods not supported by device (range: $HW_PERIODS_MIN-$HW_PERIODS_MAX)"
+        return 1
+    fi
+
+    local buffer=$((period * nperiods))
+    if [ -n "$HW_BUFFER_SIZE_MIN" ] && \
+       { [ "$buffer" -lt "$HW_BUFFER_SIZE_MIN" ] || [ "$buffer" -gt "$HW_BUFFER_SIZE_MAX" ]; }; then
+        PREFLIGHT_ERROR="Total buffer $buffer frames (${nperiods}x${period}) not supported by device (range: $HW_BUFFER_SIZE_MIN-$HW_BUFFER_SIZE_MAX)"
+        return 1
+    fi
+
+    return 0
+}
+
+# =============================================================================
+# Main Logic (when executed standalone)
+# =============================================================================
+
+if [ "${BASH_SOURCE[0]}" = "${0}" ]; then
+    case "$1" in
+        "check")
+            if [ $# -ne 4 ]; then
+                echo "Usage: $0 check <rate> <period> <nperiods>"
+                exit 2
+            fi
+            if preflight_check "$2" "$3" "$4"; then
+                echo "OK: ${2}Hz, ${4}x${3} supported"
+                exit 0
+            fi
+            echo "ERROR: $PREFLIGHT_ERROR"
+            exit 1
+            ;;
+        "probe")
+            cache_file=$(preflight_cache_file)
+            rm -f "$cache_file"
+            echo "Sample rates: $(probe_stream_rates)"
+            if device_is_idle && probe_hw_params "$cache_file"; then
+                cat "$cache_file"
+            else
+                echo "Device busy or not available - hardware ranges not probed"
+            fi
+            ;;
+        "help"|"-h"|"--help"|"")
+            echo "MOTU M4 JACK Pre-flight Check"
+            echo ""
+            echo "Usage:"
+            echo "  $0 check <rate> <period> <nperiods>  - Check configuration"
+            echo "  $0 probe                             - Re-probe device (must be idle)"
+            echo ""
+            echo "As include in other scripts:"
+            echo "  source motu-m4-jack-preflight.sh"
+            echo "  preflight_check 48000 128 2 || echo \"\$PREFLIGHT_ERROR\""
+            ;;
+        *)
+            echo "Error: Unknown option '$1'"
+            echo "Use '$0 help' for more information."
+            exit 1
+            ;;
+    esac
+fi
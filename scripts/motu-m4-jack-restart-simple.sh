@@ -45,22 +45,31 @@ log "=== MOTU M4 JACK Server Restart started ==="
 # User Detection
 # =============================================================================
 
-# Dynamic detection of active user (same as shutdown script)
-ACTIVE_USER=$(who | grep "(:" | head -n1 | awk '{print $1}')
-
-# Fallback: If no active user detected, try SUDO_USER
-if [ -z "$ACTIVE_USER" ]; then
-    ACTIVE_USER="${SUDO_USER:-}"
+# Session resolver (logind-based, cached - same as shutdown script)
+SESSION_LIB="$SCRIPT_DIR/motu-m4-session.sh"
+if [ ! -f "$SESSION_LIB" ]; then
+    fail "Session resolver not found: $SESSION_LIB"
 fi
-
-if [ -z "$ACTIVE_USER" ]; then
-    log "ERROR: No active user detected - cannot restart JACK"
-    exit 1
+# shellcheck source=/dev/null
+. "$SESSION_LIB"
+
+# Active graphical session on seat0 (X11 or Wayland)
+if ! resolve_session; then
+    # Fallback: If no active session detected, try SUDO_USER
+    if [ -z "${SUDO_USER:-}" ]; then
+        log "ERROR: No active user detected - cannot restart JACK"
+        exit 1
+    fi
+    SESSION_USER="$SUDO_USER"
+    SESSION_UID=$(id -u "$SUDO_USER")
+    SESSION_RUNTIME_DIR="/run/user/$SESSION_UID"
+    # shellcheck disable=SC2034  # used by session_env_exports
+    SESSION_DBUS_ADDRESS="unix:path=$SESSION_RUNTIME_DIR/bus"
 fi
-USER="$ACTIVE_USER"
-USER_ID=$(id -u "$USER")
+USER="$SESSION_USER"
+USER_ID="$SESSION_UID"
 
-log "Detected user: $USER (ID: $USER_ID)"
+log "Detected user: $USER (ID: $USER_ID, ${SESSION_TYPE:-no graphical session})"
 echo "Detected user: $USER"
 
 # =============================================================================
@@ -77,6 +86,23 @@ if [ ! -f "$INIT_SCRIPT" ]; then
     fail "Init script not found: $INIT_SCRIPT"
 fi
 
+# =============================================================================
+# Pre-flight Check
+# =============================================================================
+
+# Check the new configuration before JACK is stopped - once the shutdown has
+# run, a rejected configuration would leave the system without audio. The
+# init script resolves the configuration exactly as in phase 2.
+if [ -d /proc/asound/M4 ]; then
+    if ! PREFLIGHT_OUTPUT=$(runuser -l "$USER" -c "
+$(session_env_exports)
+bash '$INIT_SCRIPT' --preflight-only
+" 2>&1); then
+        fail "$(echo "$PREFLIGHT_OUTPUT" | tail -n1 | sed 's/^ERROR: //') - JACK left unchanged"
+    fi
+    log "$(echo "$PREFLIGHT_OUTPUT" | tail -n1)"
+fi
+
 # =============================================================================
 # Phase 1: Shutdown
 # =============================================================================
@@ -99,9 +125,7 @@ echo "Using absolute path: $INIT_SCRIPT"
 
 # Execute init script as detected user with correct environment variables
 runuser -l "$USER" -c "
-export DISPLAY=:1
-export DBUS_SESSION_BUS_ADDRESS=unix:path=/run/user/$USER_ID/bus
-export XDG_RUNTIME_DIR=/run/user/$USER_ID
+$(session_env_exports)
 bash '$INIT_SCRIPT'
 " >> $LOG 2>&1 || fail "Init script failed"
 
@@ -27,6 +27,12 @@ NC='\033[0m' # No Color
 SYSTEM_CONFIG_DIR="/etc/motu-m4"
 SYSTEM_CONFIG_FILE="$SYSTEM_CONFIG_DIR/jack-setting.conf"
 
+# Pre-flight check library
+PREFLIGHT_LIB="/usr/local/bin/motu-m4-jack-preflight.sh"
+
+# Session resolver (active desktop user)
+SESSION_LIB="/usr/local/bin/motu-m4-session.sh"
+
 # =============================================================================
 # Preset Definitions (for backward compatibility)
 # =============================================================================
@@ -103,6 +109,38 @@ validate_nperiods() {
     return 1
 }
 
+# Validate JACK MIDI driver of the ALSA backend
+validate_midi_driver() {
+    case "$1" in
+        none|raw|seq)
+            return 0
+            ;;
+    esac
+    return 1
+}
+
+# Check configuration against the device's hardware parameters
+# (skipped if the M4 is not connected - config can be prepared offline)
+run_preflight_check() {
+    local rate=$1
+    local period=$2
+    local nperiods=$3
+
+    if [ ! -f "$PREFLIGHT_LIB" ] || [ ! -d /proc/asound/M4 ]; then
+        return 0
+    fi
+
+    # shellcheck source=/dev/null
+    . "$PREFLIGHT_LIB"
+    if ! preflight_check "$rate" "$period" "$nperiods"; then
+        echo -e "${RED}Error:${NC} $PREFLIGHT_ERROR"
+        echo "Configuration not saved - JACK was not changed."
+        echo "$PREFLIGHT_ERROR" >&2
+        return 1
+    fi
+    return 0
+}
+
 # =============================================================================
 # Display Functions
 # =============================================================================
@@ -155,6 +193,20 @@ show_valid_values() {
     echo ""
 }
 
+# Set KEY=value in the system config (replace the line or append it)
+set_config_value() {
+    local key=$1
+    local value=$2
+    local escaped
+
+    if grep -q "^${key}=" "$SYSTEM_CONFIG_FILE"; then
+        escaped=$(printf '%s' "$value" | sed 's/[&|\\]/\\&/g')
+        sed -i "s|^${key}=.*|${key}=${escaped}|" "$SYSTEM_CONFIG_FILE"
+    else
+        echo "${key}=${value}" >> "$SYSTEM_CONFIG_FILE"
+    fi
+}
+
 # Show current system-wide configuration
 show_current() {
     echo -e "${BLUE}System-wide JACK Configuration:${NC}"
@@ -166,10 +218,12 @@ show_current() {
         local period
         local nperiods
         local a2j_enable
+        local midi_driver
         rate=$(grep "^JACK_RATE=" "$SYSTEM_CONFIG_FILE" 2>/dev/null | cut -d'=' -f2 | tr -d ' ')
         period=$(grep "^JACK_PERIOD=" "$SYSTEM_CONFIG_FILE" 2>/dev/null | cut -d'=' -f2 | tr -d ' ')
         nperiods=$(grep "^JACK_NPERIODS=" "$SYSTEM_CONFIG_FILE" 2>/dev/null | cut -d'=' -f2 | tr -d ' ')
         a2j_enable=$(grep "^A2J_ENABLE=" "$SYSTEM_CONFIG_FILE" 2>/dev/null | cut -d'=' -f2 | tr -d ' ')
+        midi_driver=$(grep "^JACK_MIDI_DRIVER=" "$SYSTEM_CONFIG_FILE" 2>/dev/null | cut -d'=' -f2 | tr -d ' ')
 
         if [ -n "$rate" ] || [ -n "$period" ] || [ -n "$nperiods" ]; then
             # v2.0 format
@@ -177,6 +231,7 @@ show_current() {
             period=${period:-256}
             nperiods=${nperiods:-3}
             a2j_enable=${a2j_enable:-false}
+            midi_driver=${midi_driver:-none}
 
             local latency
             latency=$(calc_latency "$rate" "$period" "$nperiods")
@@ -188,6 +243,7 @@ show_current() {
             echo -e "${CYAN}Periods:${NC}      $nperiods"
             echo -e "${CYAN}Latency:${NC}      ~${latency} ms"
             echo -e "${CYAN}A2J Bridge:${NC}   $a2j_enable"
+            echo -e "${CYAN}JACK MIDI:${NC}    $midi_driver"
             echo ""
             echo -e "${BLUE}Config File:${NC} $SYSTEM_CONFIG_FILE"
         else
@@ -240,7 +296,8 @@ set_custom_setting() {
     local period=$2
     local nperiods=$3
     local a2j_enable=$4
-    local restart_flag=$5
+    local midi_driver=$5
+    local restart_flag=$6
 
     # Validate parameters
     if ! validate_rate "$rate"; then
@@ -261,6 +318,18 @@ set_custom_setting() {
         exit 1
     fi
 
+    # Empty MIDI driver: keep the configured one
+    if [ -n "$midi_driver" ] && ! validate_midi_driver "$midi_driver"; then
+        echo -e "${RED}Error:${NC} Invalid JACK MIDI driver '$midi_driver'"
+        echo "Valid drivers: none raw seq"
+        exit 1
+    fi
+
+    # Pre-flight check against the connected device (before anything is changed)
+    if ! run_preflight_check "$rate" "$period" "$nperiods"; then
+        exit 1
+    fi
+
     # Create directory if not present
     mkdir -p "$SYSTEM_CONFIG_DIR"
 
@@ -268,23 +337,28 @@ set_custom_setting() {
     local latency
     latency=$(calc_latency "$rate" "$period" "$nperiods")
 
-    # Create configuration file (v2.0 format)
-    cat > "$SYSTEM_CONFIG_FILE" << EOF
+    # Create configuration file (v2.0 format) if not present
+    if [ ! -f "$SYSTEM_CONFIG_FILE" ]; then
+        cat > "$SYSTEM_CONFIG_FILE" << EOF
 # MOTU M4 JACK System-wide Configuration
 # Format: v2.0
 # Generated by motu-m4-jack-setting-system.sh on $(date)
-#
-# Sample Rate: $(printf "%'d" "$rate") Hz
-# Buffer Size: $period frames
-# Periods: $nperiods
-# Calculated Latency: ~${latency} ms
-# A2J MIDI Bridge: $a2j_enable
-
-JACK_RATE=$rate
-JACK_PERIOD=$period
-JACK_NPERIODS=$nperiods
-A2J_ENABLE=$a2j_enable
+
 EOF
+    fi
+
+    # Update only the keys being set - all other settings are kept
+    sed -i '/^JACK_SETTING=/d' "$SYSTEM_CONFIG_FILE"
+    set_config_value JACK_RATE "$rate"
+    set_config_value JACK_PERIOD "$period"
+    set_config_value JACK_NPERIODS "$nperiods"
+    set_config_value A2J_ENABLE "$a2j_enable"
+    if [ -n "$midi_driver" ]; then
+        set_config_value JACK_MIDI_DRIVER "$midi_driver"
+    else
+        midi_driver=$(grep "^JACK_MIDI_DRIVER=" "$SYSTEM_CONFIG_FILE" 2>/dev/null | cut -d'=' -f2 | tr -d ' ')
+        midi_driver=${midi_driver:-none}
+    fi
 
     # Set permissions (readable for all)
     chmod 644 "$SYSTEM_CONFIG_FILE"
@@ -296,6 +370,7 @@ EOF
     echo -e "${CYAN}Periods:${NC}      $nperiods"
     echo -e "${CYAN}Latency:${NC}      ~${latency} ms"
     echo -e "${CYAN}A2J Bridge:${NC}   $a2j_enable"
+    echo -e "${CYAN}JACK MIDI:${NC}    $midi_driver"
     echo ""
     echo -e "${BLUE}Saved to:${NC} $SYSTEM_CONFIG_FILE"
 
@@ -316,17 +391,18 @@ EOF
 set_preset() {
     local preset=$1
     local a2j_enable=$2
-    local restart_flag=$3
+    local midi_driver=$3
+    local restart_flag=$4
 
     case "$preset" in
         1)
-            set_custom_setting $PRESET1_RATE $PRESET1_PERIOD $PRESET1_NPERIODS "$a2j_enable" "$restart_flag"
+            set_custom_setting $PRESET1_RATE $PRESET1_PERIOD $PRESET1_NPERIODS "$a2j_enable" "$midi_driver" "$restart_flag"
             ;;
         2)
-            set_custom_setting $PRESET2_RATE $PRESET2_PERIOD $PRESET2_NPERIODS "$a2j_enable" "$restart_flag"
+            set_custom_setting $PRESET2_RATE $PRESET2_PERIOD $PRESET2_NPERIODS "$a2j_enable" "$midi_driver" "$restart_flag"
             ;;
         3)
-            set_custom_setting $PRESET3_RATE $PRESET3_PERIOD $PRESET3_NPERIODS "$a2j_enable" "$restart_flag"
+            set_custom_setting $PRESET3_RATE $PRESET3_PERIOD $PRESET3_NPERIODS "$a2j_enable" "$midi_driver" "$restart_flag"
             ;;
         *)
             echo -e "${RED}Error:${NC} Invalid preset '$preset'. Use 1, 2, or 3."
@@ -368,9 +444,18 @@ perform_jack_restart() {
         return 1
     fi
 
-    # Check if JACK is running
+    # Check if JACK is running (as the active desktop user)
     local jack_running=false
-    if runuser -l "$(who | grep "(:" | head -n1 | awk '{print $1}')" -c "jack_control status 2>/dev/null | grep -q started" 2>/dev/null; then
+    local session_user="${SUDO_USER:-}"
+    if [ -f "$SESSION_LIB" ]; then
+        # shellcheck source=/dev/null
+        . "$SESSION_LIB"
+        if resolve_session; then
+            session_user="$SESSION_USER"
+        fi
+    fi
+    if [ -n "$session_user" ] && \
+       runuser -l "$session_user" -c "jack_control status 2>/dev/null | grep -q started" 2>/dev/null; then
         jack_running=true
     fi
 
@@ -419,6 +504,7 @@ show_help() {
     echo "  --period=<frames> Buffer size (16-4096)"
     echo "  --nperiods=<n>    Number of periods (2-8)"
     echo "  --a2j=<bool>      Enable ALSA-to-JACK MIDI bridge (true/false)"
+    echo "  --midi-driver=<d> JACK MIDI driver: none, raw (direct, skips ALSA-seq), seq (default: unchanged)"
     echo "  --restart, -r     Automatically restart JACK after changes"
     echo ""
     echo -e "${CYAN}Examples:${NC}"
@@ -448,6 +534,7 @@ parse_arguments() {
     local period=""
     local nperiods=""
     local a2j_enable=""
+    local midi_driver=""
     local restart_flag=""
     local preset=""
     local command=""
@@ -466,6 +553,9 @@ parse_arguments() {
             --a2j=*)
                 a2j_enable="${arg#*=}"
                 ;;
+            --midi-driver=*)
+                midi_driver="${arg#*=}"
+                ;;
             --restart|-r)
                 restart_flag="--restart"
                 ;;
@@ -510,12 +600,12 @@ parse_arguments() {
         check_root
         # Use defaults for a2j if not specified
         a2j_enable=${a2j_enable:-false}
-        set_preset "$preset" "$a2j_enable" "$restart_flag"
+        set_preset "$preset" "$a2j_enable" "$midi_driver" "$restart_flag"
         exit 0
     fi
 
     # Handle custom configuration
-    if [ -n "$rate" ] || [ -n "$period" ] || [ -n "$nperiods" ] || [ -n "$a2j_enable" ]; then
+    if [ -n "$rate" ] || [ -n "$period" ] || [ -n "$nperiods" ] || [ -n "$a2j_enable" ] || [ -n "$midi_driver" ]; then
         check_root
 
         # Use defaults for missing values
@@ -524,7 +614,7 @@ parse_arguments() {
         nperiods=${nperiods:-3}
         a2j_enable=${a2j_enable:-false}
 
-        set_custom_setting "$rate" "$period" "$nperiods" "$a2j_enable" "$restart_flag"
+        set_custom_setting "$rate" "$period" "$nperiods" "$a2j_enable" "$midi_driver" "$restart_flag"
         exit 0
     fi
 
@@ -28,6 +28,9 @@ USER_CONFIG_DIR="$HOME/.config/motu-m4"
 USER_CONFIG_FILE="$USER_CONFIG_DIR/jack-setting.conf"
 SYSTEM_CONFIG_FILE="/etc/motu-m4/jack-setting.conf"
 
+# Pre-flight check library
+PREFLIGHT_LIB="/usr/local/bin/motu-m4-jack-preflight.sh"
+
 # =============================================================================
 # Preset Definitions (for backward compatibility)
 # =============================================================================
@@ -95,6 +98,28 @@ validate_nperiods() {
     return 1
 }
 
+# Check configuration against the device's hardware parameters
+# (skipped if the M4 is not connected - config can be prepared offline)
+run_preflight_check() {
+    local rate=$1
+    local period=$2
+    local nperiods=$3
+
+    if [ ! -f "$PREFLIGHT_LIB" ] || [ ! -d /proc/asound/M4 ]; then
+        return 0
+    fi
+
+    # shellcheck source=/dev/null
+    . "$PREFLIGHT_LIB"
+    if ! preflight_check "$rate" "$period" "$nperiods"; then
+        echo -e "${RED}Error:${NC} $PREFLIGHT_ERROR"
+        echo "Configuration not saved - JACK was not changed."
+        echo "$PREFLIGHT_ERROR" >&2
+        return 1
+    fi
+    return 0
+}
+
 # =============================================================================
 # Display Functions
 # =============================================================================
@@ -147,6 +172,20 @@ show_valid_values() {
     echo ""
 }
 
+# Set KEY=value in the user config (replace the line or append it)
+set_config_value() {
+    local key=$1
+    local value=$2
+    local escaped
+
+    if grep -q "^${key}=" "$USER_CONFIG_FILE"; then
+        escaped=$(printf '%s' "$value" | sed 's/[&|\\]/\\&/g')
+        sed -i "s|^${key}=.*|${key}=${escaped}|" "$USER_CONFIG_FILE"
+    else
+        echo "${key}=${value}" >> "$USER_CONFIG_FILE"
+    fi
+}
+
 # Show current configuration
 show_current() {
     echo -e "${BLUE}Current JACK Configuration:${NC}"
@@ -245,6 +284,11 @@ set_custom_setting() {
         exit 1
     fi
 
+    # Pre-flight check against the connected device (before anything is changed)
+    if ! run_preflight_check "$rate" "$period" "$nperiods"; then
+        exit 1
+    fi
+
     # Create directory if not present
     mkdir -p "$USER_CONFIG_DIR"
 
@@ -252,21 +296,21 @@ set_custom_setting() {
     local latency
     latency=$(calc_latency "$rate" "$period" "$nperiods")
 
-    # Create configuration file (v2.0 format)
-    cat > "$USER_CONFIG_FILE" << EOF
+    # Create configuration file (v2.0 format) if not present
+    if [ ! -f "$USER_CONFIG_FILE" ]; then
+        cat > "$USER_CONFIG_FILE" << EOF
 # MOTU M4 JACK User Configuration
 # Format: v2.0
 # Generated by motu-m4-jack-setting.sh on $(date)
-#
-# Sample Rate: $(printf "%'d" "$rate") Hz
-# Buffer Size: $period frames
-# Periods: $nperiods
-# Calculated Latency: ~${latency} ms
-
-JACK_RATE=$rate
-JACK_PERIOD=$period
-JACK_NPERIODS=$nperiods
+
 EOF
+    fi
+
+    # Update only the keys being set - all other settings are kept
+    sed -i '/^JACK_SETTING=/d' "$USER_CONFIG_FILE"
+    set_config_value JACK_RATE "$rate"
+    set_config_value JACK_PERIOD "$period"
+    set_config_value JACK_NPERIODS "$nperiods"
 
     echo -e "${GREEN}User configuration saved!${NC}"
     echo ""
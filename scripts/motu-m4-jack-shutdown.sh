@@ -19,31 +19,77 @@ log() {
 
 log "M4 Audio Interface removed - Shutting down JACK"
 
-# Dynamic detection of active user
-ACTIVE_USER=$(who | grep "(:" | head -n1 | awk '{print $1}')
+# Session resolver (logind-based, cached)
+SESSION_LIB="/usr/local/bin/motu-m4-session.sh"
+if [ -f "$SESSION_LIB" ]; then
+    # shellcheck source=/dev/null
+    . "$SESSION_LIB"
+    resolve_session
+fi
 
-# Fallback: If no active user detected, try via SUDO_USER
-if [ -z "$ACTIVE_USER" ]; then
-    ACTIVE_USER="${SUDO_USER:-}"
+# Fallback: If no active session detected, try via SUDO_USER
+if [ -z "$SESSION_USER" ]; then
+    SESSION_USER="${SUDO_USER:-}"
 fi
 
-if [ -z "$ACTIVE_USER" ]; then
+if [ -z "$SESSION_USER" ]; then
     log "WARNING: No active user detected - trying to continue anyway"
     USER="${USER:-root}"
 else
-    USER="$ACTIVE_USER"
+    USER="$SESSION_USER"
 fi
 USER_ID=$(id -u "$USER" 2>/dev/null || echo "")
+SESSION_RUNTIME_DIR="${SESSION_RUNTIME_DIR:-/run/user/$USER_ID}"
+SESSION_DBUS_ADDRESS="${SESSION_DBUS_ADDRESS:-unix:path=$SESSION_RUNTIME_DIR/bus}"
 
 log "Stopping JACK for user: $USER"
 
 # Set environment variables
-export DISPLAY=:1
-export DBUS_SESSION_BUS_ADDRESS=unix:path=/run/user/$USER_ID/bus
-export XDG_RUNTIME_DIR=/run/user/$USER_ID
+export DBUS_SESSION_BUS_ADDRESS="$SESSION_DBUS_ADDRESS"
+export XDG_RUNTIME_DIR="$SESSION_RUNTIME_DIR"
+if [ -n "$SESSION_DISPLAY" ]; then
+    export DISPLAY="$SESSION_DISPLAY"
+fi
+
+# Snapshot the port connection graph so it can be restored after restart
+CONNECTIONS_TOOL="/usr/local/bin/motu-m4-jack-connections.py"
+
+# Stop a helper started by the init script via its PID file.
+# /run/motu-m4 is world-writable: only signal a process of the session user
+# whose command line matches the helper.
+stop_helper() {
+    local pid_file="$1"
+    local name="$2"
+    local pid
+
+    [ -f "$pid_file" ] || return 0
+    pid=$(cat "$pid_file" 2>/dev/null)
+    rm -f "$pid_file" 2>/dev/null
+
+    [[ "$pid" =~ ^[0-9]+$ ]] || return 0
+    [ "$(stat -c %u "/proc/$pid" 2>/dev/null)" = "$USER_ID" ] || return 0
+    tr '\0' ' ' < "/proc/$pid/cmdline" 2>/dev/null | grep -qF "$name" || return 0
+
+    log "Stopping $name (PID: $pid)"
+    kill -TERM "$pid" 2>/dev/null || true
+}
+
+# Finish performance log session, MIDI statistics and power watcher before
+# JACK goes away (they write their final state on SIGTERM)
+stop_helper /run/motu-m4/perflog.pid motu-m4-jack-perflog.py
+stop_helper /run/motu-m4/midi-monitor.pid motu-m4-midi-monitor.py
+stop_helper /run/motu-m4/power-profile.pid motu-m4-power-profile.sh
 
 # Stop JACK and A2J cleanly
 runuser -l "$USER" -c "
+export DBUS_SESSION_BUS_ADDRESS='$SESSION_DBUS_ADDRESS'
+export XDG_RUNTIME_DIR='$SESSION_RUNTIME_DIR'
+
+# Save connection graph while all clients are still registered
+if [ -x '$CONNECTIONS_TOOL' ]; then
+    '$CONNECTIONS_TOOL' save 2>&1 || true
+fi
+
 # First stop A2J MIDI Bridge cleanly (if running)
 if a2j_control --status 2>/dev/null | grep -q 'bridge is running'; then
     echo 'Stopping A2J MIDI Bridge cleanly...'
@@ -36,9 +36,16 @@ WAIT_TIME=0
 
 log "Login check: Waiting for user login..."
 
+# Session resolver (logind-based, cached)
+# shellcheck source=/dev/null
+. /usr/local/bin/motu-m4-session.sh
+
 while [ $WAIT_TIME -lt $MAX_WAIT ]; do
-    # Check for logged-in user with X11 display
-    USER_LOGGED_IN=$(who | grep "(:" | head -n1 | awk '{print $1}')
+    # Check for logged-in user with a graphical session (X11 or Wayland)
+    USER_LOGGED_IN=""
+    if resolve_session; then
+        USER_LOGGED_IN="$SESSION_USER"
+    fi
 
     if [ -n "$USER_LOGGED_IN" ]; then
         log "Login check: User $USER_LOGGED_IN logged in after $WAIT_TIME seconds"
@@ -0,0 +1,232 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+MOTU M4 JACK MIDI Monitor
+Measures per-port MIDI event throughput and timing jitter of hardware MIDI
+ports in JACK (a2jmidid bridge ports or the direct 'raw' JACK MIDI ports).
+
+For every hardware MIDI capture port, a private input port is connected.
+Events are timestamped with JACK frame time. Jitter is the standard
+deviation of MIDI clock (0xF8) intervals, which should be constant when a
+device sends clock. Statistics are written every few seconds to
+/run/motu-m4/midi-stats.json for the GUI:
+
+    {"updated": 1760000000.0, "rate": 48000,
+     "ports": {"a2j:M4 [24] (capture): M4 MIDI 1":
+               {"events_per_sec": 12.5, "jitter_ms": 0.21, "clock_bpm": 120.0}}}
+
+Usage:
+  motu-m4-midi-monitor.py [--interval SECONDS]
+
+Requires python3-jack-client.
+
+Copyright (C) 2026
+License: GPL-3.0-or-later
+"""
+
+import argparse
+import json
+import logging
+import math
+import os
+import signal
+import sys
+import threading
+import time
+
+try:
+    import jack
+except ImportError:
+    jack = None
+
+STATS_FILE = "/run/motu-m4/midi-stats.json"
+CLIENT_NAME = "motu-m4-midi-monitor"
+MIDI_CLOCK_MESSAGE = b"\xf8"
+
+# Ports of these clients are monitored in addition to physical ports
+BRIDGE_CLIENTS = ("a2j",)
+
+logging.basicConfig(
+    level=logging.INFO,
+    format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
+)
+logger = logging.getLogger("motu-m4-midi-monitor")
+
+
+class PortStats:
+    """Event counters and clock interval statistics for one source port"""
+
+    def __init__(self):
+        self.events = 0
+        self.last_clock_frame = None
+        # Running sums of clock intervals (frames) for mean/stddev
+        self.clock_count = 0
+        self.clock_sum = 0.0
+        self.clock_sum_sq = 0.0
+
+    def reset(self):
+        """Starts a new measurement window (keeps last clock timestamp)"""
+        self.events = 0
+        self.clock_count = 0
+        self.clock_sum = 0.0
+        self.clock_sum_sq = 0.0
+
+
+class MidiMonitor:
+    """JACK client measuring MIDI throughput and jitter"""
+
+    def __init__(self, interval):
+        self.interval = interval
+        self.client = jack.Client(CLIENT_NAME, no_start_server=True)
+        self.lock = threading.Lock()
+        self.stop_event = threading.Event()
+        self.rescan_event = threading.Event()
+
+        # Private input port -> (source port name, PortStats)
+        self.inputs = {}
+        self.port_counter = 0
+
+        self.client.set_process_callback(self.process)
+        self.client.set_shutdown_callback(self.on_shutdown)
+        self.client.set_port_registration_callback(self.on_port_registration)
+
+    def process(self, frames):
+        """JACK process callback - count events, track clock intervals"""
+        base = self.client.last_frame_time
+        with self.lock:
+            for port, (_, stats) in self.inputs.items():
+                for offset, data in port.incoming_midi_events():
+                    stats.events += 1
+                    # Event data is a cffi buffer - indexing it yields bytes
+                    if bytes(data) == MIDI_CLOCK_MESSAGE:
+                        frame = base + offset
+                        if stats.last_clock_frame is not None:
+                            delta = frame - stats.last_clock_frame
+                            stats.clock_count += 1
+                            stats.clock_sum += delta
+                            stats.clock_sum_sq += delta * delta
+                        stats.last_clock_frame = frame
+
+    def on_shutdown(self, status, reason):
+        """JACK shutdown callback"""
+        logger.info("JACK shut down: %s", reason)
+        self.stop_event.set()
+
+    def on_port_registration(self, port, register):
+        """New or removed ports - rescan outside of the notification thread"""
+        self.rescan_event.set()
+
+    def source_ports(self):
+        """Returns hardware MIDI capture ports (physical or bridge ports)"""
+        ports = []
+        for port in self.client.get_ports(is_midi=True, is_output=True):
+            client_name = port.name.partition(":")[0]
+            if port.is_physical or client_name in BRIDGE_CLIENTS:
+                ports.append(port.name)
+        return ports
+
+    def rescan(self):
+        """Registers/connects an input port for every hardware MIDI source"""
+        sources = set(self.source_ports())
+        with self.lock:
+            monitored = {source: port for port, (source, _) in self.inputs.items()}
+
+        for source in sources - set(monitored):
+            self.port_counter += 1
+            port = self.client.midi_inports.register(f"in_{self.port_counter}")
+            try:
+                self.client.connect(source, port)
+            except jack.JackError as e:
+                logger.warning("Could not connect %s: %s", source, str(e))
+                port.unregister()
+                continue
+            with self.lock:
+                self.inputs[port] = (source, PortStats())
+            logger.info("Monitoring %s", source)
+
+        for source in set(monitored) - sources:
+            port = monitored[source]
+            with self.lock:
+                del self.inputs[port]
+            port.unregister()
+            logger.info("Stopped monitoring %s", source)
+
+    def collect(self):
+        """Returns statistics of the last window and starts a new one"""
+        rate = self.client.samplerate
+        result = {}
+        with self.lock:
+            for source, stats in self.inputs.values():
+                entry = {
+                    "events_per_sec": round(stats.events / self.interval, 1),
+                    "jitter_ms": None,
+                    "clock_bpm": None,
+                }
+                if stats.clock_count >= 2:
+                    mean = stats.clock_sum / stats.clock_count
+                    variance = max(0.0, stats.clock_sum_sq / stats.clock_count - mean * mean)
+                    entry["jitter_ms"] = round(math.sqrt(variance) / rate * 1000, 3)
+                    # 24 MIDI clocks per quarter note
+                    entry["clock_bpm"] = round(60.0 * rate / (mean * 24), 1)
+                result[source] = entry
+                stats.reset()
+        return result
+
+    def write_stats(self, ports):
+        """Writes statistics atomically for the GUI"""
+        stats = {"updated": time.time(), "rate": self.client.samplerate, "ports": ports}
+        os.makedirs(os.path.dirname(STATS_FILE), exist_ok=True)
+        tmp_path = f"{STATS_FILE}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(stats, f, separators=(",", ":"))
+        os.replace(tmp_path, STATS_FILE)
+
+    def run(self):
+        """Runs until JACK shuts down or the monitor is stopped"""
+        self.client.activate()
+        self.rescan()
+        try:
+            while not self.stop_event.wait(self.interval):
+                if self.rescan_event.is_set():
+                    self.rescan_event.clear()
+                    self.rescan()
+                self.write_stats(self.collect())
+        finally:
+            try:
+                os.remove(STATS_FILE)
+            except OSError:
+                pass
+            try:
+                self.client.deactivate()
+                self.client.close()
+            except jack.JackError:
+                pass
+
+
+def main():
+    """Main entry point"""
+    parser = argparse.ArgumentParser(description="JACK MIDI throughput/jitter monitor")
+    parser.add_argument(
+        "--interval", type=int, default=2, help="Statistics window in seconds"
+    )
+    args = parser.parse_args()
+
+    if jack is None:
+        logger.error("python3-jack-client not installed - MIDI statistics disabled")
+        return 1
+
+    try:
+        monitor = MidiMonitor(args.interval)
+    except jack.JackError as e:
+        logger.error("JACK not reachable, MIDI monitor not started: %s", str(e))
+        return 1
+
+    signal.signal(signal.SIGTERM, lambda signum, frame: monitor.stop_event.set())
+    signal.signal(signal.SIGINT, lambda signum, frame: monitor.stop_event.set())
+
+    monitor.run()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
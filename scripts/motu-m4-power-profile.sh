@@ -0,0 +1,594 @@
+#!/bin/bash
+
+# =============================================================================
+# MOTU M4 JACK Power Profile Switching
+# =============================================================================
+# Switches JACK between two profiles depending on power source and CPU
+# thermal state:
+#
+#   performance - the configured JACK_PERIOD/JACK_NPERIODS (on AC power)
+#   efficiency  - larger period / more periods (on battery or when the CPU
+#                 is hot or throttling), so the CPU can reach deeper idle
+#                 states
+#
+# If both profiles use the same number of periods, the buffer size is changed
+# at runtime with jack_bufsize and all clients stay connected. Otherwise JACK
+# is restarted through the init script (connections are saved and restored).
+#
+# Battery power draw and CPU wakeups (interrupts/s) are measured per profile
+# and written to /run/motu-m4/power-profile.state, so the trade-off can be
+# compared ('status', GUI). Power is only measurable while discharging; use
+# 'compare' on battery to measure both profiles back to back.
+#
+# Runs in user context. Started by the init script when
+# POWER_PROFILE_ENABLE=true and stopped by the shutdown script.
+#
+# Copyright (C) 2026
+# License: GPL-3.0-or-later
+# =============================================================================
+
+LOG="/run/motu-m4/jack-power-profile.log"
+STATE_FILE="/run/motu-m4/power-profile.state"
+LOCK_FILE="/run/motu-m4/power-profile.lock"
+HOLD_FILE="/run/motu-m4/power-profile.hold"
+PID_FILE="/run/motu-m4/power-profile.pid"
+
+INIT_SCRIPT="/usr/local/bin/motu-m4-jack-init.sh"
+CONNECTIONS_TOOL="/usr/local/bin/motu-m4-jack-connections.py"
+
+SYSTEM_CONFIG_FILE="/etc/motu-m4/jack-setting.conf"
+USER_CONFIG_FILE="$HOME/.config/motu-m4/jack-setting.conf"
+
+# Defaults (overridden by configuration)
+DEFAULT_PERIOD=256
+DEFAULT_NPERIODS=3
+DEFAULT_EFFICIENCY_PERIOD=512
+DEFAULT_EFFICIENCY_NPERIODS=3
+DEFAULT_THERMAL_LIMIT=85
+DEFAULT_CHECK_INTERVAL=10
+
+# Minimum time between profile switches (seconds, avoids flapping)
+MIN_SWITCH_INTERVAL=60
+# Temperature must drop this far below the limit to leave thermal mode
+THERMAL_HYSTERESIS=10
+
+mkdir -p /run/motu-m4 2>/dev/null
+
+# =============================================================================
+# Logging
+# =============================================================================
+
+log() {
+    echo "$(date): $1" >> $LOG
+}
+
+# =============================================================================
+# Configuration Loading
+# =============================================================================
+
+# Read a value from user config, then system config, then default
+read_setting() {
+    local key="$1"
+    local default="$2"
+    local config_file
+    local value
+    for config_file in "$USER_CONFIG_FILE" "$SYSTEM_CONFIG_FILE"; do
+        if [ -f "$config_file" ]; then
+            value=$(grep "^${key}=" "$config_file" | cut -d'=' -f2 | tr -d ' ')
+            if [ -n "$value" ]; then
+                echo "$value"
+                return 0
+            fi
+        fi
+    done
+    echo "$default"
+}
+
+load_profiles() {
+    PERFORMANCE_PERIOD=$(read_setting JACK_PERIOD "$DEFAULT_PERIOD")
+    PERFORMANCE_NPERIODS=$(read_setting JACK_NPERIODS "$DEFAULT_NPERIODS")
+    EFFICIENCY_PERIOD=$(read_setting POWER_EFFICIENCY_PERIOD "$DEFAULT_EFFICIENCY_PERIOD")
+    EFFICIENCY_NPERIODS=$(read_setting POWER_EFFICIENCY_NPERIODS "$DEFAULT_EFFICIENCY_NPERIODS")
+    THERMAL_LIMIT=$(read_setting POWER_THERMAL_LIMIT "$DEFAULT_THERMAL_LIMIT")
+    CHECK_INTERVAL=$(read_setting POWER_CHECK_INTERVAL "$DEFAULT_CHECK_INTERVAL")
+}
+
+# =============================================================================
+# Power and Thermal State
+# =============================================================================
+
+# Returns 0 on AC power (also if the system has no mains supply info)
+on_ac_power() {
+    local supply
+    local found_mains=false
+    for supply in /sys/class/power_supply/*; do
+        [ -f "$supply/type" ] || continue
+        if [ "$(cat "$supply/type")" = "Mains" ]; then
+            found_mains=true
+            if [ "$(cat "$supply/online" 2>/dev/null)" = "1" ]; then
+                return 0
+            fi
+        fi
+    done
+    [ "$found_mains" = false ]
+}
+
+# Battery discharge power in mW (empty if not discharging)
+battery_power_mw() {
+    local supply
+    local total=""
+    local power
+    for supply in /sys/class/power_supply/*; do
+        [ "$(cat "$supply/type" 2>/dev/null)" = "Battery" ] || continue
+        [ "$(cat "$supply/status" 2>/dev/null)" = "Discharging" ] || continue
+
+        if [ -f "$supply/power_now" ]; then
+            power=$(( $(cat "$supply/power_now") / 1000 ))
+        elif [ -f "$supply/current_now" ] && [ -f "$supply/voltage_now" ]; then
+            # uA * uV = pW
+            power=$(( $(cat "$supply/current_now") * $(cat "$supply/voltage_now") / 1000000000 ))
+        else
+            continue
+        fi
+        total=$(( ${total:-0} + power ))
+    done
+    echo "$total"
+}
+
+# Print the highest of the given millidegree sensor files in degrees Celsius
+# (nothing if none is readable)
+max_sensor_temperature() {
+    [ "$#" -gt 0 ] || return 0
+    cat "$@" 2>/dev/null | \
+        awk '$1 > max || !n { max = $1; n = 1 } END { if (n) print int(max / 1000) }'
+}
+
+# CPU temperature in degrees Celsius. Only CPU sensors count - wifi, battery
+# or chipset zones must not force the efficiency profile:
+#   1. CPU thermal zones (x86_pkg_temp, cpu*)
+#   2. coretemp/k10temp hwmon sensors (AMD has no CPU thermal zone)
+#   3. ACPI thermal zone as fallback
+cpu_temperature() {
+    local zone
+    local hwmon
+    local temperature
+    local cpu_zones=()
+    local acpi_zones=()
+    local cpu_sensors=()
+
+    for zone in /sys/class/thermal/thermal_zone*; do
+        case "$(cat "$zone/type" 2>/dev/null)" in
+            x86_pkg_temp|cpu*|CPU*) cpu_zones+=("$zone/temp") ;;
+            acpitz) acpi_zones+=("$zone/temp") ;;
+        esac
+    done
+    for hwmon in /sys/class/hwmon/hwmon*; do
+        case "$(cat "$hwmon/name" 2>/dev/null)" in
+            coretemp|k10temp|zenpower)
+                cpu_sensors+=("$hwmon"/temp*_input)
+                ;;
+        esac
+    done
+
+    temperature=$(max_sensor_temperature "${cpu_zones[@]}")
+    [ -n "$temperature" ] || temperature=$(max_sensor_temperature "${cpu_sensors[@]}")
+    [ -n "$temperature" ] || temperature=$(max_sensor_temperature "${acpi_zones[@]}")
+    echo "${temperature:-0}"
+}
+
+# Sum of CPU thermal throttling events since boot
+throttle_count() {
+    cat /sys/devices/system/cpu/cpu*/thermal_throttle/*_throttle_count 2>/dev/null | \
+        awk '{ sum += $1 } END { print sum + 0 }'
+}
+
+# Total interrupts since boot (CPU wakeup indicator)
+interrupt_count() {
+    awk '/^intr/ { print $2; exit }' /proc/stat
+}
+
+# =============================================================================
+# State File
+# =============================================================================
+
+STATE_FIELDS="PROFILE REASON SWITCHED PERFORMANCE_DESC EFFICIENCY_DESC PERFORMANCE_POWER_MW EFFICIENCY_POWER_MW PERFORMANCE_WAKEUPS EFFICIENCY_WAKEUPS UPDATED"
+
+# Load the state file (plain KEY=value lines, never sourced)
+read_state() {
+    local key
+    local value
+    [ -f "$STATE_FILE" ] || return 0
+    while IFS='=' read -r key value; do
+        case " $STATE_FIELDS " in
+            *" $key "*)
+                printf -v "$key" '%s' "$value"
+                ;;
+        esac
+    done < "$STATE_FILE"
+}
+
+# Fields are written indirectly via STATE_FIELDS
+# shellcheck disable=SC2034
+write_state() {
+    local field
+    UPDATED=$(date +%s)
+    PERFORMANCE_DESC="${PERFORMANCE_NPERIODS}x${PERFORMANCE_PERIOD}"
+    EFFICIENCY_DESC="${EFFICIENCY_NPERIODS}x${EFFICIENCY_PERIOD}"
+    {
+        for field in $STATE_FIELDS; do
+            echo "$field=${!field}"
+        done
+    } > "$STATE_FILE.tmp" && mv -f "$STATE_FILE.tmp" "$STATE_FILE"
+}
+
+# Exponential moving average (integer): avg(old, new)
+smooth() {
+    local old="$1"
+    local new="$2"
+    if [ -z "$old" ]; then
+        echo "$new"
+    else
+        echo $(( (old * 7 + new * 3) / 10 ))
+    fi
+}
+
+# Take one measurement for the current profile.
+# Uses MEASURE_LAST_INTR/MEASURE_LAST_TIME from the previous call.
+measure() {
+    local now
+    local intr
+    now=$(date +%s)
+    intr=$(interrupt_count)
+
+    if [ -n "$MEASURE_LAST_TIME" ] && [ "$now" -gt "$MEASURE_LAST_TIME" ]; then
+        local wakeups=$(( (intr - MEASURE_LAST_INTR) / (now - MEASURE_LAST_TIME) ))
+        local power
+        power=$(battery_power_mw)
+
+        if [ "$PROFILE" = "efficiency" ]; then
+            EFFICIENCY_WAKEUPS=$(smooth "$EFFICIENCY_WAKEUPS" "$wakeups")
+            [ -n "$power" ] && EFFICIENCY_POWER_MW=$(smooth "$EFFICIENCY_POWER_MW" "$power")
+        else
+            PERFORMANCE_WAKEUPS=$(smooth "$PERFORMANCE_WAKEUPS" "$wakeups")
+            [ -n "$power" ] && PERFORMANCE_POWER_MW=$(smooth "$PERFORMANCE_POWER_MW" "$power")
+        fi
+    fi
+
+    MEASURE_LAST_TIME="$now"
+    MEASURE_LAST_INTR="$intr"
+}
+
+# Forget the last counter sample (after a switch the system has to settle)
+reset_measurement() {
+    MEASURE_LAST_TIME=""
+    MEASURE_LAST_INTR=""
+}
+
+# =============================================================================
+# Profile Switching
+# =============================================================================
+
+jack_running() {
+    jack_control status 2>/dev/null | grep -q "started"
+}
+
+# Take the buffer size from the running server - JACK may have been
+# restarted or resized by someone else (Apply, init run directly)
+sync_running_period() {
+    local period
+    command -v jack_bufsize > /dev/null 2>&1 || return 0
+    period=$(jack_bufsize 2>/dev/null | awk '/buffer size/ { print $4; exit }')
+    [[ "$period" =~ ^[0-9]+$ ]] || return 0
+    [ "$period" != "$RUNNING_PERIOD" ] || return 0
+
+    log "JACK buffer size changed outside the watcher: ${RUNNING_PERIOD:-unknown} -> $period"
+    RUNNING_PERIOD="$period"
+    if [ "$period" = "$EFFICIENCY_PERIOD" ] && [ "$period" != "$PERFORMANCE_PERIOD" ]; then
+        PROFILE="efficiency"
+    elif [ "$period" = "$PERFORMANCE_PERIOD" ] && [ "$period" != "$EFFICIENCY_PERIOD" ]; then
+        PROFILE="performance"
+    fi
+}
+
+# Sleep that is interrupted by TERM/INT (a plain sleep delays the trap until
+# it ends). The sleep must not keep the watcher lock (fd 9) open.
+watcher_sleep() {
+    sleep "$1" 9>&- &
+    SLEEP_PID=$!
+    wait "$SLEEP_PID"
+    SLEEP_PID=""
+}
+
+# Apply a profile. Uses a runtime buffer size change if possible.
+apply_profile() {
+    local profile="$1"
+    local period
+    local nperiods
+    local current_nperiods
+
+    if [ "$profile" = "efficiency" ]; then
+        period="$EFFICIENCY_PERIOD"
+        nperiods="$EFFICIENCY_NPERIODS"
+    else
+        period="$PERFORMANCE_PERIOD"
+        nperiods="$PERFORMANCE_NPERIODS"
+    fi
+    current_nperiods="${RUNNING_NPERIODS:-$PERFORMANCE_NPERIODS}"
+
+    if [ "$period" = "${RUNNING_PERIOD:-}" ] && [ "$nperiods" = "$current_nperiods" ]; then
+        return 0
+    fi
+
+    # Only the buffer size differs: change it at runtime, clients stay connected
+    if [ "$nperiods" = "$current_nperiods" ] && command -v jack_bufsize > /dev/null 2>&1; then
+        if jack_bufsize "$period" >> $LOG 2>&1; then
+            log "Switched to $profile profile at runtime: ${nperiods}x${period}"
+            RUNNING_PERIOD="$period"
+            return 0
+        fi
+        log "WARNING: Runtime buffer size change failed - restarting JACK"
+    fi
+
+    # Number of periods differs: restart JACK with the profile's parameters
+    log "Restarting JACK for $profile profile: ${nperiods}x${period}"
+    if [ -x "$CONNECTIONS_TOOL" ]; then
+        "$CONNECTIONS_TOOL" save >> $LOG 2>&1
+    fi
+    # Lock descriptor must not leak into JACK clients started by init
+    if JACK_PERIOD="$period" JACK_NPERIODS="$nperiods" "$INIT_SCRIPT" >> $LOG 2>&1 9>&-; then
+        RUNNING_PERIOD="$period"
+        RUNNING_NPERIODS="$nperiods"
+        return 0
+    fi
+    log "ERROR: JACK restart for $profile profile failed"
+    return 1
+}
+
+# Decide the profile for the current power/thermal state.
+# Sets WANTED_PROFILE and WANTED_REASON.
+decide_profile() {
+    local temperature
+    local throttles
+    temperature=$(cpu_temperature)
+    throttles=$(throttle_count)
+
+    local throttled=false
+    if [ -n "$LAST_THROTTLES" ] && [ "$throttles" -gt "$LAST_THROTTLES" ]; then
+        throttled=true
+    fi
+    LAST_THROTTLES="$throttles"
+
+    if [ "$throttled" = true ]; then
+        WANTED_PROFILE="efficiency"
+        WANTED_REASON="CPU throttling (${temperature}°C)"
+    elif [ "$temperature" -ge "$THERMAL_LIMIT" ]; then
+        WANTED_PROFILE="efficiency"
+        WANTED_REASON="CPU temperature ${temperature}°C"
+    elif [ "$PROFILE" = "efficiency" ] && [ "${REASON#CPU}" != "$REASON" ] && \
+         [ "$temperature" -gt $((THERMAL_LIMIT - THERMAL_HYSTERESIS)) ]; then
+        # Stay in thermal mode until the CPU has cooled down
+        WANTED_PROFILE="efficiency"
+        WANTED_REASON="$REASON"
+    elif ! on_ac_power; then
+        WANTED_PROFILE="efficiency"
+        WANTED_REASON="battery"
+    else
+        WANTED_PROFILE="performance"
+        WANTED_REASON="AC power"
+    fi
+}
+
+# Another process (compare) temporarily controls the profile
+hold_active() {
+    local pid
+    pid=$(cat "$HOLD_FILE" 2>/dev/null)
+    [ -n "$pid" ] && kill -0 "$pid" 2>/dev/null
+}
+
+# =============================================================================
+# Commands
+# =============================================================================
+
+# Arguments: period and nperiods JACK was started with (by the init script)
+watch_power() {
+    exec 9> "$LOCK_FILE"
+    if ! flock -n 9; then
+        log "Power profile watcher already running"
+        return 0
+    fi
+    # Only the instance holding the lock is stopped by the shutdown script
+    echo $$ > "$PID_FILE"
+
+    load_profiles
+    read_state
+    RUNNING_PERIOD="${1:-$PERFORMANCE_PERIOD}"
+    RUNNING_NPERIODS="${2:-$PERFORMANCE_NPERIODS}"
+    if [ "$RUNNING_PERIOD/$RUNNING_NPERIODS" = "$EFFICIENCY_PERIOD/$EFFICIENCY_NPERIODS" ]; then
+        PROFILE="efficiency"
+    else
+        PROFILE="performance"
+    fi
+    REASON="start"
+    SWITCHED=0
+    LAST_SWITCH=0
+    local held=false
+
+    # Mark the watcher as stopped when terminated by the shutdown script
+    trap '[ -n "$SLEEP_PID" ] && kill "$SLEEP_PID" 2>/dev/null; PROFILE=""; REASON=""; write_state; rm -f "$PID_FILE"; exit 0' TERM INT
+
+    log "Power profile watcher started: performance ${PERFORMANCE_NPERIODS}x${PERFORMANCE_PERIOD}, efficiency ${EFFICIENCY_NPERIODS}x${EFFICIENCY_PERIOD}, thermal limit ${THERMAL_LIMIT}°C"
+
+    while true; do
+        # 'compare' controls the profile and may restart JACK - a transient
+        # stop while it holds the profile must not end the watcher
+        if hold_active; then
+            held=true
+            reset_measurement
+            watcher_sleep "$CHECK_INTERVAL"
+            continue
+        fi
+        jack_running || break
+        sync_running_period
+
+        # Take over the measurements of the finished compare run
+        if [ "$held" = true ]; then
+            read_state
+            held=false
+        fi
+
+        decide_profile
+        local now
+        now=$(date +%s)
+
+        if [ "$WANTED_PROFILE" != "$PROFILE" ] && [ $((now - LAST_SWITCH)) -ge "$MIN_SWITCH_INTERVAL" ]; then
+            log "Switching to $WANTED_PROFILE profile ($WANTED_REASON)"
+            # Keep the latest measurements of the other process (compare)
+            read_state
+            if apply_profile "$WANTED_PROFILE"; then
+                PROFILE="$WANTED_PROFILE"
+                # shellcheck disable=SC2034  # written via STATE_FIELDS
+                SWITCHED="$now"
+                LAST_SWITCH="$now"
+            fi
+            REASON="$WANTED_REASON"
+            reset_measurement
+        else
+            if [ "$WANTED_PROFILE" = "$PROFILE" ]; then
+                REASON="$WANTED_REASON"
+            else
+                REASON="switch pending ($WANTED_REASON)"
+            fi
+            measure
+        fi
+
+        write_state
+        watcher_sleep "$CHECK_INTERVAL"
+    done
+
+    log "JACK stopped - power profile watcher exiting"
+    # Keep the measurements for the next session
+    PROFILE=""
+    REASON=""
+    write_state
+    rm -f "$PID_FILE"
+}
+
+# Measure both profiles back to back (run on battery for power values)
+compare_profiles() {
+    local seconds="${1:-60}"
+    local original
+    local profile
+
+    load_profiles
+    read_state
+    original="${PROFILE:-performance}"
+
+    if ! jack_running; then
+        echo "JACK is not running"
+        return 1
+    fi
+    if [ -z "$(battery_power_mw)" ]; then
+        echo "Note: not running on battery - only CPU wakeups can be measured"
+    fi
+
+    echo $$ > "$HOLD_FILE"
+    trap 'rm -f "$HOLD_FILE"' EXIT
+
+    # The watcher does not know the running buffer size of the other profile
+    if [ "$original" = "efficiency" ]; then
+        RUNNING_PERIOD="$EFFICIENCY_PERIOD"
+        RUNNING_NPERIODS="$EFFICIENCY_NPERIODS"
+    else
+        RUNNING_PERIOD="$PERFORMANCE_PERIOD"
+        RUNNING_NPERIODS="$PERFORMANCE_NPERIODS"
+    fi
+
+    for profile in performance efficiency; do
+        echo "Measuring $profile profile for ${seconds}s..."
+        apply_profile "$profile" || return 1
+        PROFILE="$profile"
+        # Fresh values for this run: settle, then average over the window
+        if [ "$profile" = "efficiency" ]; then
+            EFFICIENCY_WAKEUPS=""
+            EFFICIENCY_POWER_MW=""
+        else
+            PERFORMANCE_WAKEUPS=""
+            PERFORMANCE_POWER_MW=""
+        fi
+        sleep 5
+        reset_measurement
+        measure
+        local elapsed=0
+        while [ "$elapsed" -lt "$seconds" ]; do
+            sleep 5
+            elapsed=$((elapsed + 5))
+            measure
+        done
+    done
+
+    apply_profile "$original"
+    PROFILE="$original"
+    REASON="${REASON:-compare}"
+    write_state
+    show_status
+}
+
+show_status() {
+    load_profiles
+    read_state
+
+    if [ -z "$PROFILE" ]; then
+        echo "Power profile watcher not running (POWER_PROFILE_ENABLE=false or JACK stopped)"
+    else
+        echo "Active profile: $PROFILE ($REASON)"
+    fi
+    if on_ac_power; then
+        echo "Power source:   AC"
+    else
+        echo "Power source:   battery"
+    fi
+    echo "CPU temperature: $(cpu_temperature)°C (limit: ${THERMAL_LIMIT}°C)"
+    echo ""
+    printf "%-12s %-8s %14s %12s\n" "Profile" "Buffer" "Wakeups/s" "Power"
+    printf "%-12s %-8s %14s %12s\n" "performance" "${PERFORMANCE_NPERIODS}x${PERFORMANCE_PERIOD}" \
+        "${PERFORMANCE_WAKEUPS:-n/a}" "${PERFORMANCE_POWER_MW:+$PERFORMANCE_POWER_MW mW}"
+    printf "%-12s %-8s %14s %12s\n" "efficiency" "${EFFICIENCY_NPERIODS}x${EFFICIENCY_PERIOD}" \
+        "${EFFICIENCY_WAKEUPS:-n/a}" "${EFFICIENCY_POWER_MW:+$EFFICIENCY_POWER_MW mW}"
+
+    if [ -n "$PERFORMANCE_POWER_MW" ] && [ -n "$EFFICIENCY_POWER_MW" ]; then
+        echo ""
+        echo "Efficiency profile saves $((PERFORMANCE_POWER_MW - EFFICIENCY_POWER_MW)) mW"
+    fi
+    if [ -n "$PERFORMANCE_WAKEUPS" ] && [ -n "$EFFICIENCY_WAKEUPS" ]; then
+        echo "Efficiency profile saves $((PERFORMANCE_WAKEUPS - EFFICIENCY_WAKEUPS)) wakeups/s"
+    fi
+}
+
+# =============================================================================
+# Main Entry Point
+# =============================================================================
+
+case "$1" in
+    "watch")
+        watch_power "$2" "$3"
+        ;;
+    "status"|"")
+        show_status
+        ;;
+    "compare")
+        compare_profiles "$2"
+        ;;
+    "help"|"-h"|"--help")
+        echo "MOTU M4 JACK Power Profile Switching"
+        echo ""
+        echo "Usage:"
+        echo "  $0 status            - Show active profile and measurements (default)"
+        echo "  $0 watch [period nperiods] - Switch profiles on power/thermal changes"
+        echo "  $0 compare [seconds] - Measure both profiles back to back (default: 60s each)"
+        ;;
+    *)
+        echo "Error: Unknown option '$1'"
+        echo "Use '$0 help' for more information."
+        exit 1
+        ;;
+esac
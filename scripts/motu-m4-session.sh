@@ -0,0 +1,320 @@
+#!/bin/bash
+
+# =============================================================================
+# MOTU M4 Session Resolver
+# =============================================================================
+# Finds the user context for JACK operations in one lookup: the active
+# graphical session on seat0 (X11 or Wayland), its user, UID, home, runtime
+# dir, DBus session bus address and display.
+#
+# Source of truth is systemd-logind (loginctl). The result is cached in
+# /run/motu-m4/session.cache. The cache is invalidated when:
+#   - logind rewrites its seat/session state files (checked on every lookup)
+#   - the watcher ('watch' mode, motu-m4-session-watch.service) receives a
+#     SessionNew/SessionRemoved signal or an ActiveSession change on a seat
+#
+# Without logind, the first 'who' entry with a display is used (not cached).
+#
+# Can be sourced as a library or run standalone.
+#
+# Copyright (C) 2026
+# License: GPL-3.0-or-later
+# =============================================================================
+
+SESSION_CACHE_FILE="/run/motu-m4/session.cache"
+SESSION_SEAT="seat0"
+
+# Fields set by resolve_session (and stored in the cache)
+SESSION_FIELDS="SESSION_ID SESSION_USER SESSION_UID SESSION_HOME SESSION_TYPE SESSION_DISPLAY SESSION_WAYLAND_DISPLAY SESSION_RUNTIME_DIR SESSION_DBUS_ADDRESS"
+
+# =============================================================================
+# Cache
+# =============================================================================
+
+session_clear_fields() {
+    local field
+    for field in $SESSION_FIELDS; do
+        printf -v "$field" '%s' ""
+    done
+}
+
+# Check whether the cache is still valid for the current logind state
+session_cache_valid() {
+    [ -f "$SESSION_CACHE_FILE" ] || return 1
+
+    # /run/motu-m4 is world-writable - only trust caches written by root or
+    # by the current user
+    local owner
+    owner=$(stat -c %u "$SESSION_CACHE_FILE" 2>/dev/null)
+    if [ "$owner" != "0" ] && [ "$owner" != "$(id -u)" ]; then
+        return 1
+    fi
+
+    # logind rewrites the seat file when the active session changes
+    local seat_file="/run/systemd/seats/$SESSION_SEAT"
+    if [ -f "$seat_file" ] && [ ! "$SESSION_CACHE_FILE" -nt "$seat_file" ]; then
+        return 1
+    fi
+
+    # Cached session must still exist and be unchanged
+    local cached_id
+    cached_id=$(sed -n 's/^SESSION_ID=//p' "$SESSION_CACHE_FILE")
+    if [ -n "$cached_id" ]; then
+        local session_file="/run/systemd/sessions/$cached_id"
+        [ -f "$session_file" ] || return 1
+        [ "$SESSION_CACHE_FILE" -nt "$session_file" ] || return 1
+    fi
+    return 0
+}
+
+# Load fields from the cache (plain KEY=value lines, never sourced)
+session_read_cache() {
+    local key
+    local value
+    session_clear_fields
+    while IFS='=' read -r key value; do
+        case " $SESSION_FIELDS " in
+            *" $key "*)
+                printf -v "$key" '%s' "$value"
+                ;;
+        esac
+    done < "$SESSION_CACHE_FILE"
+}
+
+session_write_cache() {
+    local field
+    local tmp_file="$SESSION_CACHE_FILE.$$"
+    mkdir -p "$(dirname "$SESSION_CACHE_FILE")" 2>/dev/null || return 0
+    {
+        for field in $SESSION_FIELDS; do
+            echo "$field=${!field}"
+        done
+    } > "$tmp_file" 2>/dev/null && mv -f "$tmp_file" "$SESSION_CACHE_FILE" 2>/dev/null
+    rm -f "$tmp_file" 2>/dev/null
+    return 0
+}
+
+session_invalidate() {
+    rm -f "$SESSION_CACHE_FILE" 2>/dev/null
+    return 0
+}
+
+# =============================================================================
+# Session Discovery
+# =============================================================================
+
+# Print "KEY=value" properties of a logind session
+session_properties() {
+    loginctl show-session "$1" \
+        -p Name -p User -p Type -p Class -p Display -p State -p Active 2>/dev/null
+}
+
+# Find the active graphical user session (seat0 first, then any seat)
+session_find_logind() {
+    local id
+    local props
+
+    id=$(loginctl show-seat "$SESSION_SEAT" -p ActiveSession --value 2>/dev/null)
+    if [ -n "$id" ]; then
+        props=$(session_properties "$id")
+        if echo "$props" | grep -q "^Class=user$" && \
+           echo "$props" | grep -qE "^Type=(x11|wayland|mir)$"; then
+            echo "$id"
+            return 0
+        fi
+    fi
+
+    # No active graphical session on seat0 (greeter, VT switch, other seat)
+    for id in $(loginctl list-sessions --no-legend 2>/dev/null | awk '{print $1}'); do
+        props=$(session_properties "$id")
+        if echo "$props" | grep -q "^Class=user$" && \
+           echo "$props" | grep -qE "^Type=(x11|wayland|mir)$" && \
+           echo "$props" | grep -qE "^State=(active|online)$"; then
+            echo "$id"
+            return 0
+        fi
+    done
+    return 1
+}
+
+# Fill fields for a logind session
+session_fill_from_logind() {
+    local id="$1"
+    local props
+    props=$(session_properties "$id")
+
+    SESSION_ID="$id"
+    SESSION_USER=$(echo "$props" | sed -n 's/^Name=//p')
+    SESSION_UID=$(echo "$props" | sed -n 's/^User=//p')
+    SESSION_TYPE=$(echo "$props" | sed -n 's/^Type=//p')
+    SESSION_DISPLAY=$(echo "$props" | sed -n 's/^Display=//p')
+}
+
+# Fallback without logind: first 'who' entry with a display
+session_fill_from_who() {
+    local entry
+    entry=$(who 2>/dev/null | grep "(:" | head -n1)
+    [ -n "$entry" ] || return 1
+
+    SESSION_USER=$(echo "$entry" | awk '{print $1}')
+    SESSION_UID=$(id -u "$SESSION_USER" 2>/dev/null)
+    SESSION_TYPE="x11"
+    SESSION_DISPLAY=$(echo "$entry" | grep -o '(:[0-9.]*)' | tr -d '()')
+}
+
+# Fill runtime dir, DBus address and displays not reported by logind
+session_fill_runtime() {
+    # shellcheck disable=SC2034  # read via SESSION_FIELDS by callers
+    SESSION_HOME=$(getent passwd "$SESSION_USER" | cut -d: -f6)
+    SESSION_RUNTIME_DIR="/run/user/$SESSION_UID"
+    SESSION_DBUS_ADDRESS="unix:path=$SESSION_RUNTIME_DIR/bus"
+
+    # Wayland compositor socket in the runtime dir (wayland-0, wayland-1, ...)
+    if [ "$SESSION_TYPE" = "wayland" ]; then
+        SESSION_WAYLAND_DISPLAY=$(find "$SESSION_RUNTIME_DIR" -maxdepth 1 -type s -name 'wayland-*' \
+            -printf '%f\n' 2>/dev/null | sort | head -n1)
+    fi
+
+    # Wayland sessions have no X display in logind - use Xwayland's if running
+    if [ -z "$SESSION_DISPLAY" ]; then
+        SESSION_DISPLAY=$(pgrep -u "$SESSION_UID" -a Xwayland 2>/dev/null | grep -o ' :[0-9]*' | head -n1 | tr -d ' ')
+    fi
+}
+
+# Resolve the active session. Returns 0 and sets SESSION_* if a graphical
+# user session exists, 1 otherwise (SESSION_* empty).
+resolve_session() {
+    if session_cache_valid; then
+        session_read_cache
+        [ -n "$SESSION_USER" ]
+        return
+    fi
+
+    session_clear_fields
+
+    if command -v loginctl > /dev/null 2>&1 && [ -d /run/systemd/seats ]; then
+        local id
+        if id=$(session_find_logind); then
+            session_fill_from_logind "$id"
+            session_fill_runtime
+        fi
+        # Negative results are cached too (a login rewrites the seat file)
+        session_write_cache
+    elif session_fill_from_who; then
+        session_fill_runtime
+    fi
+
+    [ -n "$SESSION_USER" ]
+}
+
+# =============================================================================
+# Environment Helpers
+# =============================================================================
+
+# Print export statements for the session environment. Used inside
+# 'runuser -l ... -c', which starts with a clean environment.
+session_env_exports() {
+    echo "export XDG_RUNTIME_DIR='$SESSION_RUNTIME_DIR'"
+    echo "export DBUS_SESSION_BUS_ADDRESS='$SESSION_DBUS_ADDRESS'"
+    if [ -n "$SESSION_DISPLAY" ]; then
+        echo "export DISPLAY='$SESSION_DISPLAY'"
+    fi
+    if [ -n "$SESSION_WAYLAND_DISPLAY" ]; then
+        echo "export WAYLAND_DISPLAY='$SESSION_WAYLAND_DISPLAY'"
+    fi
+}
+
+# Export the session environment into the current shell
+session_export_env() {
+    export XDG_RUNTIME_DIR="$SESSION_RUNTIME_DIR"
+    export DBUS_SESSION_BUS_ADDRESS="$SESSION_DBUS_ADDRESS"
+    if [ -n "$SESSION_DISPLAY" ]; then
+        export DISPLAY="$SESSION_DISPLAY"
+    fi
+    if [ -n "$SESSION_WAYLAND_DISPLAY" ]; then
+        export WAYLAND_DISPLAY="$SESSION_WAYLAND_DISPLAY"
+    fi
+}
+
+# =============================================================================
+# Watcher (invalidates the cache on logind signals)
+# =============================================================================
+
+watch_sessions() {
+    if ! command -v gdbus > /dev/null 2>&1; then
+        # Not an error: the unit must not be restarted for this
+        echo "gdbus not found - cache is validated against logind state files only"
+        return 0
+    fi
+
+    echo "Watching logind signals for session changes..."
+    session_invalidate
+    resolve_session
+
+    local line
+    gdbus monitor --system --dest org.freedesktop.login1 2>/dev/null | while read -r line; do
+        case "$line" in
+            *SessionNew*|*SessionRemoved*|*/seat/*PropertiesChanged*)
+                session_invalidate
+                # Resolve right away so the next lifecycle action hits the cache
+                if resolve_session; then
+                    echo "Session changed: $SESSION_USER ($SESSION_TYPE, session $SESSION_ID)"
+                else
+                    echo "Session changed: no graphical user session"
+                fi
+                ;;
+        esac
+    done
+}
+
+# =============================================================================
+# Main Logic (when executed standalone)
+# =============================================================================
+
+if [ "${BASH_SOURCE[0]}" = "${0}" ]; then
+    case "$1" in
+        "resolve"|"")
+            if resolve_session; then
+                for field in $SESSION_FIELDS; do
+                    echo "$field=${!field}"
+                done
+                exit 0
+            fi
+            echo "No graphical user session found"
+            exit 1
+            ;;
+        "env")
+            resolve_session || exit 1
+            session_env_exports
+            ;;
+        "user")
+            resolve_session || exit 1
+            echo "$SESSION_USER"
+            ;;
+        "invalidate")
+            session_invalidate
+            ;;
+        "watch")
+            watch_sessions
+            ;;
+        "help"|"-h"|"--help")
+            echo "MOTU M4 Session Resolver"
+            echo ""
+            echo "Usage:"
+            echo "  $0 resolve     - Show the active graphical session (default)"
+            echo "  $0 user        - Print the session user"
+            echo "  $0 env         - Print export statements for the session environment"
+            echo "  $0 invalidate  - Drop the cached session"
+            echo "  $0 watch       - Invalidate the cache on logind signals (service)"
+            echo ""
+            echo "As include in other scripts:"
+            echo "  source motu-m4-session.sh"
+            echo "  resolve_session && echo \"\$SESSION_USER \$SESSION_DISPLAY\""
+            ;;
+        *)
+            echo "Error: Unknown option '$1'"
+            echo "Use '$0 help' for more information."
+            exit 1
+            ;;
+    esac
+fi
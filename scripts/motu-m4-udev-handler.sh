@@ -3,13 +3,19 @@
 # =============================================================================
 # MOTU M4 UDEV Event Handler
 # =============================================================================
-# This script is triggered by UDEV when a sound device is added/removed.
-# It detects M4 connections and calls appropriate startup/shutdown scripts.
+# This script is triggered by UDEV when the M4 sound device is added/removed.
+# Events are debounced: each event only records the requested transition and
+# schedules a worker. After a short settle window, only the newest event is
+# processed, so bursts from USB re-enumeration result in a single start or
+# stop. A lock guarantees that at most one start/stop is in flight.
 #
 # Parameters from UDEV:
 #   $1 (ACTION): "add" or "remove"
 #   $2 (KERNEL): Device kernel name (e.g., "controlC0", "card0")
 #
+# Internal (worker scheduled by this script):
+#   $1 = "process", $2 = event sequence number
+#
 # Copyright (C) 2025
 # License: GPL-3.0-or-later
 # =============================================================================
@@ -21,6 +27,19 @@ KERNEL="$2"
 # Log file path
 LOG="/run/motu-m4/jack-udev-handler.log"
 
+# Hotplug state files
+STATE_DIR="/run/motu-m4"
+EVENT_FILE="$STATE_DIR/hotplug-event"       # Newest event: "<seq> <action>"
+APPLIED_FILE="$STATE_DIR/hotplug-applied"   # Last completed transition and card instance
+EVENT_LOCK="$STATE_DIR/hotplug-event.lock"  # Serializes event recording
+WORKER_LOCK="$STATE_DIR/hotplug-worker.lock" # At most one start/stop in flight
+
+# Settle window in seconds (events within this window are coalesced)
+HOTPLUG_DEBOUNCE=2
+
+# Session resolver (logind-based, cached)
+SESSION_LIB="/usr/local/bin/motu-m4-session.sh"
+
 # Ensure log directory exists
 mkdir -p /run/motu-m4
 chmod 777 /run/motu-m4
@@ -38,78 +57,242 @@ log() {
 set -e
 trap 'log "ERROR: Script failed at line $LINENO"' ERR
 
-log "UDEV handler called: ACTION=$ACTION KERNEL=$KERNEL"
+# =============================================================================
+# Configuration Loading
+# =============================================================================
+
+if [ -f "/etc/motu-m4/jack-setting.conf" ]; then
+    CONF_DEBOUNCE=$(grep -E "^HOTPLUG_DEBOUNCE=" /etc/motu-m4/jack-setting.conf 2>/dev/null | cut -d= -f2 | tr -d ' ' || true)
+    # Passed to sleep under set -e - an invalid value would abort every worker
+    if [[ "$CONF_DEBOUNCE" =~ ^[0-9]+$ ]]; then
+        HOTPLUG_DEBOUNCE="$CONF_DEBOUNCE"
+    elif [ -n "$CONF_DEBOUNCE" ]; then
+        log "WARNING: Invalid HOTPLUG_DEBOUNCE '$CONF_DEBOUNCE' - using ${HOTPLUG_DEBOUNCE}s"
+    fi
+fi
 
 # =============================================================================
-# Device Addition Handler (when M4 is connected)
+# Helper Functions
 # =============================================================================
 
-if [ "$ACTION" = "add" ] && [[ "$KERNEL" == controlC* ]]; then
-    log "Sound controller added, checking for M4..."
+# Check whether the M4 sound card is registered
+m4_present() {
+    [ -e /proc/asound/M4 ]
+}
 
-    # Check for logged-in user (flexible X11 session detection)
-    log "DEBUG: Running who command..."
-    WHO_OUTPUT=$(who 2>&1 || echo "who command failed")
-    log "DEBUG: who output: $WHO_OUTPUT"
+# Identify the present M4 instance ("<card> <usb bus/device>"). USB
+# re-enumeration assigns a new device number, so a replugged M4 differs.
+m4_instance() {
+    local card
+    card=$(readlink /proc/asound/M4 2>/dev/null) || return 0
+    echo "$card $(cat "/proc/asound/$card/usbbus" 2>/dev/null || true)"
+}
 
-    # Search for any X11 display session (:0, :1, etc.)
-    USER_LOGGED_IN=$(echo "$WHO_OUTPUT" | grep "(:" | head -n1 | awk '{print $1}' || echo "")
-    log "DEBUG: Found user: [$USER_LOGGED_IN]"
+# Check whether a JACK server process is running
+jack_active() {
+    pgrep -x jackdbus > /dev/null 2>&1 || pgrep -x jackd > /dev/null 2>&1
+}
 
-    if [ -z "$USER_LOGGED_IN" ]; then
-        log "No user logged in, creating trigger file"
-        touch /run/motu-m4/m4-detected
-        log "DEBUG: Trigger file created"
-        exit 0
+# Detect logged-in user with a graphical session (X11 or Wayland)
+detect_logged_in_user() {
+    if [ -f "$SESSION_LIB" ]; then
+        # shellcheck source=/dev/null
+        . "$SESSION_LIB"
+        if resolve_session; then
+            echo "$SESSION_USER"
+        fi
     fi
+    return 0
+}
 
-    log "DEBUG: User is logged in, checking hardware"
-    sleep 2
+# Read the newest recorded event ("<seq> <action>")
+read_latest_event() {
+    cat "$EVENT_FILE" 2>/dev/null || true
+}
 
-    log "DEBUG: Running aplay -l..."
-    APLAY_OUTPUT=$(aplay -l 2>&1 || echo "aplay command failed")
-    log "DEBUG: aplay output: $APLAY_OUTPUT"
+# =============================================================================
+# Event Recording (runs in UDEV context - must return quickly)
+# =============================================================================
 
-    if echo "$APLAY_OUTPUT" | grep -q "M4"; then
-        log "M4 found, user $USER_LOGGED_IN logged in, starting JACK"
-        log "DEBUG: Calling motu-m4-jack-autostart.sh..."
-        /usr/local/bin/motu-m4-jack-autostart.sh >> $LOG 2>&1 || log "ERROR: Autostart script failed"
+record_event() {
+    local action="$1"
+    # UDEV provides a monotonically increasing SEQNUM for every event
+    local seq="${SEQNUM:-$(date +%s%N)}"
 
-        # NOTE: Dynamic optimizer runs separately as system service
-        log "DEBUG: Dynamic optimizer runs independently as system service"
+    # Record event unless a newer one has already been stored
+    (
+        flock -x 8
+        local latest_seq
+        latest_seq=$(read_latest_event | awk '{print $1}')
+        if [ -n "$latest_seq" ] && [ "$latest_seq" -gt "$seq" ] 2>/dev/null; then
+            log "Event $seq ($action) older than recorded event $latest_seq - ignored"
+            exit 0
+        fi
+        echo "$seq $action" > "$EVENT_FILE.tmp"
+        mv -f "$EVENT_FILE.tmp" "$EVENT_FILE"
+    ) 8> "$EVENT_LOCK"
 
-        # Async execution (commented out - runs synchronously instead)
-        # nohup /usr/local/bin/motu-m4-jack-autostart.sh >> $LOG 2>&1 &
+    # Schedule worker outside of UDEV (UDEV kills long-running RUN programs)
+    if command -v systemd-run > /dev/null 2>&1; then
+        systemd-run --no-block --quiet --collect \
+            --unit="motu-m4-hotplug-$seq" \
+            "$0" process "$seq" || log "ERROR: Could not schedule hotplug worker"
     else
-        log "No M4 found"
+        setsid nohup "$0" process "$seq" > /dev/null 2>&1 < /dev/null &
+    fi
+    log "Event $seq ($action $KERNEL) recorded, worker scheduled"
+}
+
+# =============================================================================
+# Device Addition Handler (when M4 is connected)
+# =============================================================================
+
+handle_add() {
+    log "Sound controller added, checking for M4..."
+
+    # Check for logged-in user (X11 or Wayland session)
+    local user_logged_in
+    user_logged_in=$(detect_logged_in_user)
+    log "DEBUG: Found user: [$user_logged_in]"
+
+    if [ -z "$user_logged_in" ]; then
+        log "No user logged in, creating trigger file"
+        touch /run/motu-m4/m4-detected
+        log "DEBUG: Trigger file created"
+        return 1
+    fi
+
+    if m4_present; then
+        log "M4 found, user $user_logged_in logged in, starting JACK"
+        log "DEBUG: Calling motu-m4-jack-autostart.sh..."
+        # Worker lock must not leak into the JACK helpers started by init
+        /usr/local/bin/motu-m4-jack-autostart.sh >> $LOG 2>&1 9>&- || log "ERROR: Autostart script failed"
+        return 0
     fi
 
+    log "No M4 found"
+    return 1
+}
+
 # =============================================================================
 # Device Removal Handler (when M4 is disconnected)
 # =============================================================================
 
-elif [ "$ACTION" = "remove" ] && [[ "$KERNEL" == card* ]]; then
+handle_remove() {
     log "Sound device removed, checking for M4..."
 
     # Remove trigger file
     rm -f /run/motu-m4/m4-detected 2>/dev/null
 
-    # Check for logged-in user (flexible search)
-    USER_LOGGED_IN=$(who | grep "(:" | head -n1 | awk '{print $1}' || echo "")
+    # Check for logged-in user (X11 or Wayland session)
+    local user_logged_in
+    user_logged_in=$(detect_logged_in_user)
 
-    if [ -z "$USER_LOGGED_IN" ]; then
+    if [ -z "$user_logged_in" ]; then
         log "No user logged in, skipping JACK shutdown"
-        exit 0
+        return 0
     fi
 
-    sleep 2
+    if ! m4_present; then
+        log "M4 no longer available, user $user_logged_in logged in, stopping JACK"
+        /usr/local/bin/motu-m4-jack-shutdown.sh >> $LOG 2>&1 9>&- || log "ERROR: Shutdown script failed"
+        return 0
+    fi
 
-    if ! aplay -l | grep -q "M4"; then
-        log "M4 no longer available, user $USER_LOGGED_IN logged in, stopping JACK"
-        /usr/local/bin/motu-m4-jack-shutdown.sh >> $LOG 2>&1 || log "ERROR: Shutdown script failed"
-    else
-        log "M4 still available"
+    log "M4 still available"
+    return 1
+}
+
+# =============================================================================
+# Worker (runs detached, coalesces bursts)
+# =============================================================================
+
+process_event() {
+    local seq="$1"
+    local latest
+    local latest_seq
+    local action
+
+    # Let the event burst settle
+    sleep "$HOTPLUG_DEBOUNCE"
+
+    latest=$(read_latest_event)
+    latest_seq="${latest%% *}"
+    if [ "$latest_seq" != "$seq" ]; then
+        log "Worker $seq superseded by event $latest_seq - dropped"
+        return 0
     fi
-fi
+
+    # Wait for any in-flight start/stop to finish
+    exec 9> "$WORKER_LOCK"
+    flock -x 9
+
+    # Re-check: a newer event may have arrived while waiting for the lock
+    latest=$(read_latest_event)
+    latest_seq="${latest%% *}"
+    action="${latest#* }"
+    if [ "$latest_seq" != "$seq" ]; then
+        log "Worker $seq became stale while waiting (newest: $latest_seq) - dropped"
+        return 0
+    fi
+
+    # Skip transitions that are already in effect. The action alone is not
+    # enough: a remove+add burst collapses to 'add' for a new card instance,
+    # and JACK must then be moved to it.
+    local applied
+    local state
+    applied=$(cat "$APPLIED_FILE" 2>/dev/null || true)
+    case "$action" in
+        add)
+            state="add $(m4_instance)"
+            if [ "$applied" = "$state" ] && jack_active; then
+                log "Worker $seq: JACK already running on $state - skipped"
+                return 0
+            fi
+            ;;
+        remove)
+            state="remove"
+            if [ "$applied" = "$state" ] && ! jack_active; then
+                log "Worker $seq: 'remove' already applied - skipped"
+                return 0
+            fi
+            ;;
+    esac
+
+    log "Worker $seq: processing '$action'"
+    case "$action" in
+        add)
+            if handle_add; then
+                echo "$state" > "$APPLIED_FILE"
+            fi
+            ;;
+        remove)
+            if handle_remove; then
+                echo "$state" > "$APPLIED_FILE"
+            fi
+            ;;
+        *)
+            log "Worker $seq: unknown action '$action'"
+            ;;
+    esac
+}
+
+# =============================================================================
+# Main Entry Point
+# =============================================================================
+
+case "$ACTION" in
+    add|remove)
+        log "UDEV handler called: ACTION=$ACTION KERNEL=$KERNEL SEQNUM=${SEQNUM:-unset}"
+        record_event "$ACTION"
+        ;;
+    process)
+        process_event "$KERNEL"
+        ;;
+    *)
+        log "UDEV handler called with unknown action: $ACTION"
+        exit 1
+        ;;
+esac
 
 log "UDEV handler completed"